@@ -0,0 +1,152 @@
+# Per-spider sitemap checkpoints for incremental crawls
+#
+# The date-driven spiders describe their crawl window as a table of
+# {year: months} (monthly sitemaps) or {year: {month: [start, end]}}
+# (daily sitemaps). A full run expands the whole table; an incremental run
+# (`scrapy crawl <spider> -a mode=incremental`) only generates the sitemaps
+# newer than the last fully processed one, minus a small overlap, up to today.
+
+import json
+import logging
+import os
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, 'cache', 'checkpoints')
+
+MONTH_NAMES = {
+    datetime(2000, m, 1).strftime('%B').lower(): m for m in range(1, 13)
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _month_number(month: Union[int, str]) -> int:
+    if isinstance(month, int):
+        return month
+    return MONTH_NAMES[month.lower()]
+
+
+def expand_dates(dates: Dict) -> List[date]:
+    """Expand a spider's date table into the list of sitemap dates it covers"""
+    days = []
+    for year, months in dates.items():
+        if isinstance(months, dict):
+            for month, (start, end) in months.items():
+                month = _month_number(month)
+                for day in range(start, end + 1):
+                    days.append(date(year, month, day))
+        else:
+            for month in months:
+                days.append(date(year, _month_number(month), 1))
+    return days
+
+
+def shift(day: date, step: str, n: int = 1) -> date:
+    """Move a sitemap date by n days or n months"""
+    if step == 'day':
+        return date.fromordinal(day.toordinal() + n)
+    months = day.year * 12 + (day.month - 1) + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def last_complete(step: str, today: Optional[date] = None) -> date:
+    """Newest sitemap period that can no longer receive new articles"""
+    today = today or date.today()
+    if step == 'day':
+        return shift(today, 'day', -1)
+    return shift(date(today.year, today.month, 1), 'month', -1)
+
+
+class SitemapCheckpoint:
+    """Records the newest fully processed sitemap date for one spider.
+
+    The checkpoint only advances when the spider finishes normally, so an
+    interrupted run is simply repeated from the previous checkpoint.
+    """
+
+    def __init__(self, spider_name: str, step: str = 'day', mode: str = 'full',
+                 overlap: int = 1, directory: str = CHECKPOINT_DIR):
+        if step not in ('day', 'month'):
+            raise ValueError(f"Unknown sitemap step: {step}")
+        if mode not in ('full', 'incremental'):
+            raise ValueError(f"Unknown crawl mode: {mode}")
+        self.spider_name = spider_name
+        self.step = step
+        self.mode = mode
+        self.overlap = int(overlap)
+        self.path = os.path.join(directory, f'{spider_name}.json')
+        self.generated: List[date] = []
+
+    def load(self) -> Optional[date]:
+        try:
+            with open(self.path, 'r') as f:
+                return date.fromisoformat(json.load(f)['last_sitemap_date'])
+        except FileNotFoundError:
+            return None
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None
+
+    def save(self, day: date):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'spider': self.spider_name,
+                'step': self.step,
+                'last_sitemap_date': day.isoformat(),
+                'updated_at': datetime.now().isoformat(timespec='seconds')
+            }, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def select(self, days: Iterable[date], today: Optional[date] = None) -> List[date]:
+        """Pick the sitemap dates to crawl for the current mode"""
+        days = sorted(set(days))
+        if self.mode == 'full':
+            return days
+
+        checkpoint = self.load()
+        end = today or date.today()
+        if self.step == 'month':
+            end = date(end.year, end.month, 1)
+
+        if checkpoint is None:
+            logger.warning(f"No checkpoint for {self.spider_name}, running the full date range")
+            since = None
+        else:
+            since = shift(checkpoint, self.step, -self.overlap)
+            days = [d for d in days if d > since]
+
+        # Continue past the end of the hard-coded table up to today
+        anchors = [d for d in (since, days[-1] if days else None) if d is not None]
+        if anchors:
+            day = shift(max(anchors), self.step)
+            while day <= end:
+                days.append(day)
+                day = shift(day, self.step)
+        return days
+
+    def start_urls(self, dates: Dict, url_for: Callable[[date], List[str]],
+                   today: Optional[date] = None) -> List[str]:
+        """Build the sitemap urls for a spider's date table"""
+        self.generated = self.select(expand_dates(dates), today)
+        if self.mode == 'incremental' and self.generated:
+            logger.info(f"{self.spider_name}: incremental run over "
+                        f"{self.generated[0]} - {self.generated[-1]}")
+
+        urls = []
+        for day in self.generated:
+            urls.extend(url_for(day))
+        return urls
+
+    def commit(self, reason: str, today: Optional[date] = None):
+        """Advance the checkpoint once the crawl has finished cleanly"""
+        if reason != 'finished' or not self.generated:
+            return
+        newest = min(self.generated[-1], last_complete(self.step, today))
+        previous = self.load()
+        if previous is None or newest > previous:
+            self.save(newest)
+            logger.info(f"{self.spider_name}: checkpoint advanced to {newest}")
@@ -0,0 +1,137 @@
+# Long-document chunking for spaCy pipelines
+#
+# Live blogs run to tens of thousands of characters, and a transformer
+# pipeline's memory grows with the length of the document it is given, so
+# the Guardian voice notebook set every article over 17k/20k characters
+# aside in skipped_indices and ran those by hand. split_text cuts a text at
+# paragraph, then sentence, then whitespace boundaries into chunks under a
+# token budget; pipe_long runs the chunks of all documents through nlp.pipe
+# in shared batches and stitches each document back into a single Doc.
+#
+#     from newscrawler.chunking import pipe_long
+#     for key, doc in pipe_long(nlp, ((key, text) for ...), max_tokens=400):
+#         ...  # doc.text == text, all offsets are those of the original
+#
+# Chunks are contiguous slices of the text, so concatenating them
+# reproduces it exactly and Doc.from_docs needs no offset bookkeeping.
+# Cuts follow the tokenizer: a single space stays with the token before
+# it, any other whitespace (newlines, runs of spaces) goes to the text
+# after it, as it would in one unchunked Doc.
+
+import re
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from spacy.tokens import Doc
+
+# Roughly what spaCy's tokenizer counts as tokens
+TOKEN = re.compile(r'\w+|[^\w\s]')
+
+# Blank lines, or single newlines in texts joined from paragraph lists
+PARAGRAPH_BREAK = re.compile(r'\n\s*')
+
+# End of a sentence: terminal punctuation, closing quotes/brackets, then
+# whitespace before something that can start a sentence. Requiring the
+# capital keeps "e.g. the" together; ABBREVIATION catches "U.S. forces".
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])["\'”’)\]]*\s+(?=["“‘(\[]?[A-Z0-9])')
+
+ABBREVIATION = re.compile(
+    r'(?:(?:\b[A-Za-z]\.){2,}|\b[A-Z]\.|\b(?:Mr|Mrs|Ms|Dr|Prof|St|Gen|Lt|Col|Sgt|Capt|Rep|Sen|Gov|'
+    r'Jr|Sr|No|vs|etc|Jan|Feb|Mar|Apr|Jun|Jul|Aug|Sept?|Oct|Nov|Dec)\.)$'
+)
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN.findall(text))
+
+
+def _cut(text: str, match: re.Match) -> int:
+    """Where to split at a whitespace-containing match"""
+    ws = WHITESPACE.search(text, match.start(), match.end()).start()
+    return ws + 1 if text[ws] == ' ' and text[ws:ws + 2] != '  ' else ws
+
+
+def _pieces(text: str, start: int, end: int, pattern: re.Pattern) -> List[Tuple[int, int]]:
+    """Cut text[start:end] at every match of pattern"""
+    pieces = []
+    for match in pattern.finditer(text, start, end):
+        if pattern is SENTENCE_BREAK and ABBREVIATION.search(text, max(0, match.start() - 12),
+                                                             match.start()):
+            continue
+        cut = _cut(text, match)
+        if start < cut < end:
+            pieces.append((start, cut))
+            start = cut
+    pieces.append((start, end))
+    return pieces
+
+
+def split_text(text: str, max_tokens: int = 400,
+               count: Callable[[str], int] = count_tokens) -> List[Tuple[int, int]]:
+    """(start, end) character ranges covering text, each under max_tokens.
+
+    Paragraphs and sentences are packed greedily into a chunk until the
+    next one would overflow it; a single sentence over the budget is cut at
+    whitespace. The ranges are contiguous: text[r[0][0]:r[-1][1]] == text.
+    """
+    if not text:
+        return []
+    if count(text) <= max_tokens:
+        return [(0, len(text))]
+
+    units = []
+    for para in _pieces(text, 0, len(text), PARAGRAPH_BREAK):
+        if count(text[para[0]:para[1]]) <= max_tokens:
+            units.append(para)
+            continue
+        for sent in _pieces(text, para[0], para[1], SENTENCE_BREAK):
+            if count(text[sent[0]:sent[1]]) <= max_tokens:
+                units.append(sent)
+                continue
+            # run-on sentence (tables, lists without punctuation): word by word
+            units.extend(_pieces(text, sent[0], sent[1], WHITESPACE))
+
+    chunks = []
+    chunk_start, chunk_end, chunk_tokens = units[0][0], units[0][0], 0
+    for start, end in units:
+        tokens = count(text[start:end])
+        if chunk_tokens and chunk_tokens + tokens > max_tokens:
+            chunks.append((chunk_start, chunk_end))
+            chunk_start, chunk_tokens = start, 0
+        chunk_end = end
+        chunk_tokens += tokens
+    chunks.append((chunk_start, chunk_end))
+    return chunks
+
+
+def pipe_long(nlp, docs: Iterable[Tuple[str, str]], max_tokens: int = 400, batch_size: int = 32,
+              n_process: int = 1, count: Callable[[str], int] = count_tokens,
+              exclude: Optional[List[str]] = None) -> Iterator[Tuple[str, Doc]]:
+    """nlp.pipe over (key, text) pairs of any length; yields (key, Doc) in input order.
+
+    Every document is split with split_text and the chunks of consecutive
+    documents share batches, so memory is bounded by batch_size * max_tokens
+    whatever the article length. Multi-chunk documents are merged with
+    Doc.from_docs; `exclude` is passed to it and defaults to dropping
+    user_data (transformer activations), which would otherwise be kept for
+    the whole document.
+    """
+    exclude = ['user_data'] if exclude is None else exclude
+
+    def chunks():
+        for key, text in docs:
+            ranges = split_text(text or '', max_tokens, count) or [(0, 0)]
+            for i, (start, end) in enumerate(ranges):
+                yield text[start:end] if text else '', (key, i, len(ranges))
+
+    pending = []
+    for doc, (key, i, n) in nlp.pipe(chunks(), as_tuples=True, batch_size=batch_size,
+                                     n_process=n_process):
+        pending.append(doc)
+        if i == n - 1:
+            if n == 1:
+                yield key, doc
+            else:
+                yield key, Doc.from_docs(pending, ensure_whitespace=False, exclude=exclude)
+            pending = []
@@ -0,0 +1,250 @@
+# Sparse entity co-occurrence
+#
+# Co_entity_analysis counted entities with Counter(all_ents) and compared
+# them against hand-picked Israel/Palestine sets, with nothing on which
+# entities appear together. EntityMatrix keeps a sparse article x entity
+# matrix over the output of entities.extract_entities, and every
+# co-occurrence statistic is a sparse product over a slice of its rows:
+#
+#     from newscrawler.cooccurrence import EntityMatrix
+#     m = EntityMatrix.build()                      # or EntityMatrix.load()
+#     m.neighbours('Hamas', by='pmi', source='cnn', month='2023-10')
+#     m.top_pairs(20, source='bbc')
+#     m.append(new_entities, dates); m.save()
+#
+# Two entities co-occur when they are mentioned in the same article; counts
+# are numbers of articles, not mentions. Entity ids are stable, so appending
+# new articles only adds rows (and columns for unseen entities). The matrix
+# records the feed hash of every source; after a new crawl (which renumbers
+# its articles) update() drops that source's rows and appends them afresh.
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from newscrawler.corpus import Corpus, month_of
+from newscrawler.entities import ENTITY_DIR, extracted_feed, load_entities
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+COOCCURRENCE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'cooccurrence')
+
+ARTICLE_COLUMNS = ['source', 'article_idx', 'month']
+
+logger = logging.getLogger(__name__)
+
+
+class EntityMatrix:
+    """Binary CSR matrix of articles x entities, with their source and month."""
+
+    def __init__(self, entities: Optional[List[str]] = None, articles: Optional[pd.DataFrame] = None,
+                 matrix: Optional[sp.csr_matrix] = None, feeds: Optional[Dict[str, str]] = None):
+        self.entities = list(entities or [])
+        self.ids: Dict[str, int] = {e: i for i, e in enumerate(self.entities)}
+        self.articles = articles if articles is not None else pd.DataFrame(columns=ARTICLE_COLUMNS)
+        self.articles = self.articles.reset_index(drop=True)
+        self.matrix = matrix if matrix is not None else sp.csr_matrix((0, 0), dtype=np.int32)
+        self.feeds: Dict[str, str] = dict(feeds or {})
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    # ─── building ────────────────────────────────────────────────────────────
+    def append(self, mentions: pd.DataFrame, dates: pd.DataFrame) -> int:
+        """Add the articles of an entity mentions frame not in the matrix yet.
+
+        mentions has source, article_idx and entity columns (load_entities);
+        dates has source, article_idx and date (Corpus.frame). Articles
+        without any entity are not added. Returns the number of new rows.
+        """
+        if mentions.empty:
+            return 0
+        mentions = mentions[['source', 'article_idx', 'entity']].astype(
+            {'source': str, 'entity': str}
+        )
+        keys = pd.MultiIndex.from_frame(mentions[['source', 'article_idx']])
+        known = pd.MultiIndex.from_frame(self.articles[['source', 'article_idx']].astype({'source': str}))
+        mentions = mentions[~keys.isin(known)]
+        if mentions.empty:
+            return 0
+
+        # new entities get the next ids
+        for entity in pd.unique(mentions['entity']):
+            if entity not in self.ids:
+                self.ids[entity] = len(self.entities)
+                self.entities.append(entity)
+        cols = mentions['entity'].map(self.ids).to_numpy(dtype=np.int64)
+        row_codes, row_keys = pd.factorize(pd.MultiIndex.from_frame(mentions[['source', 'article_idx']]))
+
+        # one nonzero per (article, entity), however often it is mentioned
+        pairs = np.unique(row_codes.astype(np.int64) * len(self.entities) + cols)
+        rows, cols = np.divmod(pairs, len(self.entities))
+        new = sp.csr_matrix(
+            (np.ones(len(pairs), dtype=np.int32), (rows, cols)),
+            shape=(len(row_keys), len(self.entities)),
+        )
+
+        new_articles = row_keys.to_frame(index=False, name=['source', 'article_idx'])
+        dates = dates[['source', 'article_idx', 'date']].astype({'source': str})
+        new_articles = new_articles.merge(dates, on=['source', 'article_idx'], how='left')
+        new_articles['month'] = month_of(new_articles.pop('date'))
+
+        old = self.matrix
+        old.resize((old.shape[0], len(self.entities)))
+        self.matrix = sp.vstack([old, new], format='csr')
+        self.articles = pd.concat([self.articles, new_articles[ARTICLE_COLUMNS]], ignore_index=True)
+        return new.shape[0]
+
+    def drop(self, sources: Sequence[str]) -> int:
+        """Remove the rows of the given sources; returns how many were removed"""
+        keep = ~self.articles['source'].astype(str).isin(list(sources)).to_numpy()
+        if keep.all():
+            return 0
+        self.matrix = self.matrix[np.flatnonzero(keep)]
+        self.articles = self.articles[keep].reset_index(drop=True)
+        for source in sources:
+            self.feeds.pop(source, None)
+        return int((~keep).sum())
+
+    @classmethod
+    def build(cls, sources: Optional[Sequence[str]] = None, corpus: Optional[Corpus] = None,
+              entity_dir: str = ENTITY_DIR) -> 'EntityMatrix':
+        """Matrix over the extracted entities of the (selected) sources"""
+        corpus = corpus or Corpus()
+        matrix = cls()
+        matrix.update(sources, corpus, entity_dir)
+        return matrix
+
+    def update(self, sources: Optional[Sequence[str]] = None, corpus: Optional[Corpus] = None,
+               entity_dir: str = ENTITY_DIR) -> int:
+        """Append articles extracted since the matrix was built.
+
+        Sources whose feed changed since their rows were added are dropped
+        and re-appended; sources whose entities were extracted from an
+        older feed than the corpus' current one are left out until
+        extract_entities has caught up.
+        """
+        corpus = corpus or Corpus()
+        mentions = load_entities(sources, entity_dir)
+        if mentions.empty:
+            return 0
+        present = sorted(mentions['source'].astype(str).unique())
+        feeds = {source: corpus.feed_hash(source) for source in present}
+        stale = [s for s in present if extracted_feed(s, entity_dir) != feeds[s]]
+        if stale:
+            logger.warning(f"Entities of {', '.join(stale)} predate their current feed, "
+                           f"run extract_entities first")
+        current = [s for s in present if s not in stale]
+        changed = [s for s in current if self.feeds.get(s) != feeds[s]]
+        self.drop(changed)
+
+        mentions = mentions[mentions['source'].astype(str).isin(current)]
+        if mentions.empty:
+            return 0
+        dates = corpus.frame(current, ['source', 'article_idx', 'date'])
+        added = self.append(mentions, dates)
+        self.feeds.update({s: feeds[s] for s in changed})
+        return added
+
+    # ─── persistence ─────────────────────────────────────────────────────────
+    def save(self, directory: str = COOCCURRENCE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        sp.save_npz(os.path.join(directory, 'matrix.part.npz'), self.matrix)
+        os.replace(os.path.join(directory, 'matrix.part.npz'), os.path.join(directory, 'matrix.npz'))
+        self.articles.to_parquet(os.path.join(directory, 'articles.part'))
+        os.replace(os.path.join(directory, 'articles.part'), os.path.join(directory, 'articles.parquet'))
+        with open(os.path.join(directory, 'feeds.json.part'), 'w') as f:
+            json.dump(self.feeds, f)
+        os.replace(os.path.join(directory, 'feeds.json.part'), os.path.join(directory, 'feeds.json'))
+        with open(os.path.join(directory, 'entities.json.part'), 'w') as f:
+            json.dump(self.entities, f)
+        os.replace(os.path.join(directory, 'entities.json.part'), os.path.join(directory, 'entities.json'))
+
+    @classmethod
+    def load(cls, directory: str = COOCCURRENCE_DIR) -> 'EntityMatrix':
+        with open(os.path.join(directory, 'entities.json')) as f:
+            entities = json.load(f)
+        articles = pd.read_parquet(os.path.join(directory, 'articles.parquet'))
+        matrix = sp.load_npz(os.path.join(directory, 'matrix.npz')).tocsr()
+        feeds = {}
+        # matrices saved before feeds were tracked have every source re-appended
+        if os.path.exists(os.path.join(directory, 'feeds.json')):
+            with open(os.path.join(directory, 'feeds.json')) as f:
+                feeds = json.load(f)
+        return cls(entities, articles, matrix, feeds)
+
+    # ─── statistics ──────────────────────────────────────────────────────────
+    def rows(self, source: Union[str, Sequence[str], None] = None,
+             month: Union[str, Sequence[str], None] = None) -> sp.csr_matrix:
+        """Rows of the articles of the given source(s) and month(s)"""
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in (('source', source), ('month', month)):
+            if value is not None:
+                values = [value] if isinstance(value, str) else list(value)
+                mask &= self.articles[column].isin(values).to_numpy()
+        if mask.all():
+            return self.matrix
+        return self.matrix[np.flatnonzero(mask)]
+
+    def counts(self, **where) -> np.ndarray:
+        """Number of articles mentioning each entity"""
+        return np.asarray(self.rows(**where).sum(axis=0)).ravel()
+
+    def cooccurrence(self, **where) -> sp.csr_matrix:
+        """Entity x entity article counts; the diagonal holds counts()"""
+        x = self.rows(**where)
+        return (x.T @ x).tocsr()
+
+    def pmi(self, min_count: int = 1, positive: bool = True, **where) -> sp.csr_matrix:
+        """Pointwise mutual information of every co-occurring pair.
+
+        log(P(i, j) / (P(i) P(j))) with probabilities over the articles of
+        the slice, computed on the nonzeros only; pairs seen in fewer than
+        min_count articles are dropped, and so are negative values when
+        positive=True (PPMI). The diagonal is left out.
+        """
+        x = self.rows(**where)
+        n = x.shape[0]
+        c = (x.T @ x).tocoo()
+        df = c.diagonal() if c.shape[0] else np.zeros(0)
+        keep = (c.row != c.col) & (c.data >= min_count)
+        r, k, joint = c.row[keep], c.col[keep], c.data[keep].astype(np.float64)
+        values = np.log(joint * n / (df[r].astype(np.float64) * df[k]))
+        if positive:
+            keep = values > 0
+            r, k, values = r[keep], k[keep], values[keep]
+        return sp.csr_matrix((values, (r, k)), shape=c.shape)
+
+    def neighbours(self, entity: str, k: int = 10, by: str = 'count', min_count: int = 1,
+                   **where) -> pd.DataFrame:
+        """The k entities most associated with one entity, by 'count' or 'pmi'"""
+        i = self.ids[entity]
+        x = self.rows(**where)
+        column = x[:, i]
+        # only the articles that mention the entity matter for its row
+        articles = column.nonzero()[0]
+        together = np.asarray(x[articles].sum(axis=0)).ravel()
+        together[i] = 0
+        df = np.asarray(x.sum(axis=0)).ravel()
+        result = pd.DataFrame({'entity': self.entities, 'count': together, 'articles': df})
+        result = result[result['count'] >= max(min_count, 1)]
+        result['pmi'] = np.log(result['count'] * x.shape[0] / (len(articles) * result['articles']))
+        return result.sort_values(by, ascending=False).head(k).reset_index(drop=True)
+
+    def top_pairs(self, k: int = 20, by: str = 'count', min_count: int = 1, **where) -> pd.DataFrame:
+        """The k most associated entity pairs of a slice"""
+        counts = sp.triu(self.cooccurrence(**where), k=1).tocoo()
+        keep = counts.data >= min_count
+        pairs = pd.DataFrame({'a': counts.row[keep], 'b': counts.col[keep], 'count': counts.data[keep]})
+        if by == 'pmi':
+            pmi = self.pmi(min_count, positive=False, **where)
+            pairs['pmi'] = np.asarray(pmi[pairs['a'].to_numpy(), pairs['b'].to_numpy()]).ravel()
+        pairs = pairs.sort_values(by, ascending=False).head(k).reset_index(drop=True)
+        names = np.asarray(self.entities, dtype=object)
+        pairs['a'] = names[pairs['a'].to_numpy()]
+        pairs['b'] = names[pairs['b'].to_numpy()]
+        return pairs
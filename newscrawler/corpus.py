@@ -0,0 +1,302 @@
+# Columnar corpus loader for the analysis notebooks
+#
+# Every notebook used to start with its own json.load over
+# newscrawler/data/*.json, a hand-maintained news_path dict and hard-coded
+# crawl dates. Corpus converts each crawl feed once into a Parquet file under
+# cache/corpus and serves the metadata columns from there; the long text
+# columns are only read when asked for.
+#
+#     from newscrawler.corpus import Corpus
+#     corpus = Corpus()
+#     df = corpus.frame()                  # one row per article, no text
+#     df['text'] = corpus.text(df)         # only when needed
+#
+# A cached file is reused while the feed's size and mtime are unchanged; if
+# only the mtime moved (copied or touched files) the sha256 of the feed
+# decides.
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from newscrawler.dates import date_report, normalise
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+CORPUS_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'corpus')
+
+# Bump when the Parquet layout (or how a column is derived) changes so old
+# caches are rebuilt
+SCHEMA_VERSION = 3
+
+TEXT_COLUMNS = ['description', 'text', 'key_points', 'captions', 'keyword_stats']
+
+# Numeric columns written by pipelines.TextFeaturesPipeline
+FEATURE_COLUMNS = [
+    'n_words', 'n_images', 'headline_len', 'vocab_size', 'quote_count',
+    'passive_count', 'modal_count', 'external_links', 'killed', 'died',
+    'mentions_Israel', 'mentions_Palestine',
+]
+
+SCHEMA = pa.schema(
+    [
+        ('source', pa.dictionary(pa.int32(), pa.string())),
+        ('article_idx', pa.int32()),
+        ('url', pa.string()),
+        ('title', pa.string()),
+        ('source_domain', pa.string()),
+        ('date_published', pa.string()),
+        ('date', pa.timestamp('us', tz='UTC')),
+        ('authors', pa.list_(pa.string())),
+        ('images', pa.list_(pa.string())),
+        ('matched_keywords', pa.list_(pa.string())),
+        ('description', pa.string()),
+        ('text', pa.string()),
+        ('key_points', pa.string()),
+        ('captions', pa.list_(pa.string())),
+        ('keyword_stats', pa.string()),
+    ]
+    + [(column, pa.int32()) for column in FEATURE_COLUMNS if column != 'n_images']
+    + [('n_images', pa.int32())]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def source_name(path: str) -> str:
+    """cnn_articles_20250601.json -> cnn, as the notebooks name sources"""
+    return os.path.basename(path).split('_articles')[0]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_feed(path: str) -> Iterator[Dict]:
+    """Articles of a json (list) or jsonlines feed"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _join(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ' '.join(str(v) for v in value)
+    return str(value)
+
+
+def _strings(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(v) for v in value if v is not None]
+
+
+def parse_dates(values: pd.Series, source: Optional[str] = None) -> pd.Series:
+    """Raw date_published strings -> UTC timestamps (NaT when unparseable)"""
+    dates, methods = normalise(values, source)
+    failed = int((methods == 'failed').sum())
+    if failed:
+        present = int((methods != 'missing').sum())
+        logger.info(f"{source}: {failed} of {present} dates unparseable ({failed / present:.1%})")
+    return dates
+
+
+def month_of(dates: pd.Series) -> pd.Series:
+    """UTC timestamps -> 'YYYY-MM' (None where unknown)"""
+    dates = pd.to_datetime(dates, utc=True)
+    return dates.dt.strftime('%Y-%m').where(dates.notna(), None)
+
+
+def to_table(articles: Iterable[Dict], source: str) -> pa.Table:
+    """Normalise one feed's articles into the corpus schema"""
+    columns = {field.name: [] for field in SCHEMA}
+    for idx, art in enumerate(articles, start=1):
+        columns['source'].append(source)
+        columns['article_idx'].append(idx)
+        for column in ('url', 'title', 'source_domain', 'date_published'):
+            columns[column].append(_join(art.get(column)))
+        for column in ('authors', 'images', 'matched_keywords', 'captions'):
+            columns[column].append(_strings(art.get(column)))
+        for column in ('description', 'text', 'key_points'):
+            columns[column].append(_join(art.get(column)))
+        stats = art.get('keyword_stats')
+        columns['keyword_stats'].append(json.dumps(stats) if stats else None)
+        for column in FEATURE_COLUMNS:
+            columns[column].append(art.get(column))
+        if columns['n_images'][-1] is None:
+            columns['n_images'][-1] = len(columns['images'][-1])
+
+    dates = parse_dates(pd.Series(columns['date_published'], dtype=object), source)
+    columns['date'] = pa.array(dates, type=pa.timestamp('us', tz='UTC'))
+    arrays = [
+        columns['date'] if field.name == 'date'
+        else pa.array(columns[field.name], type=field.type)
+        for field in SCHEMA
+    ]
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+class Corpus:
+    """All crawl feeds of a data directory, served from a Parquet cache.
+
+    By default only the newest crawl of each source is used, the file the
+    notebooks' news_path dicts used to point at by hand.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, cache_dir: str = CORPUS_CACHE_DIR,
+                 pattern: str = '*_articles_*.json*', latest_only: bool = True):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.pattern = pattern
+        self.latest_only = latest_only
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def feeds(self) -> Dict[str, str]:
+        """source -> feed path"""
+        paths = sorted(glob.glob(os.path.join(self.data_dir, self.pattern)))
+        if not self.latest_only:
+            return {os.path.splitext(os.path.basename(p))[0]: p for p in paths}
+        feeds = {}
+        for path in paths:
+            # dated file names sort chronologically, the newest wins
+            feeds[source_name(path)] = path
+        return feeds
+
+    @property
+    def sources(self) -> List[str]:
+        return sorted(self.feeds())
+
+    def _cache_paths(self, source: str):
+        base = os.path.join(self.cache_dir, source)
+        return f'{base}.parquet', f'{base}.meta.json'
+
+    def _is_fresh(self, source: str, path: str) -> bool:
+        parquet_path, meta_path = self._cache_paths(source)
+        if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        st = os.stat(path)
+        if meta.get('schema') != SCHEMA_VERSION or meta.get('feed') != os.path.abspath(path):
+            return False
+        if meta['size'] == st.st_size and meta['mtime_ns'] == st.st_mtime_ns:
+            return True
+        if meta['size'] == st.st_size and meta['sha256'] == file_sha256(path):
+            # same bytes under a new mtime; remember it to skip the hash next time
+            self._write_meta(source, path, meta['sha256'])
+            return True
+        return False
+
+    def _write_meta(self, source: str, path: str, sha256: str):
+        _, meta_path = self._cache_paths(source)
+        st = os.stat(path)
+        meta = {
+            'schema': SCHEMA_VERSION,
+            'feed': os.path.abspath(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'sha256': sha256,
+        }
+        with open(f'{meta_path}.part', 'w') as f:
+            json.dump(meta, f)
+        os.replace(f'{meta_path}.part', meta_path)
+
+    def convert(self, source: str, path: str) -> str:
+        """Convert one feed to Parquet (unconditionally)"""
+        parquet_path, _ = self._cache_paths(source)
+        logger.info(f"Converting {path} -> {parquet_path}")
+        sha256 = file_sha256(path)
+        table = to_table(read_feed(path), source)
+        pq.write_table(table, f'{parquet_path}.part', compression='zstd')
+        os.replace(f'{parquet_path}.part', parquet_path)
+        self._write_meta(source, path, sha256)
+        return parquet_path
+
+    def refresh(self, sources: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Make sure the cache of every (selected) source is current"""
+        feeds = self.feeds()
+        selected = feeds if sources is None else {s: feeds[s] for s in sources}
+        paths = {}
+        for source, path in selected.items():
+            if not self._is_fresh(source, path):
+                self.convert(source, path)
+            paths[source] = self._cache_paths(source)[0]
+        return paths
+
+    def feed_hash(self, source: str) -> str:
+        """sha256 of a source's current feed file (refreshing its cache)"""
+        self.refresh([source])
+        with open(self._cache_paths(source)[1]) as f:
+            return json.load(f)['sha256']
+
+    def table(self, columns: Optional[List[str]] = None,
+              sources: Optional[Iterable[str]] = None) -> pa.Table:
+        """Arrow table over the selected sources; all columns by default"""
+        paths = self.refresh(sources)
+        if not paths:
+            return SCHEMA.empty_table() if columns is None else \
+                SCHEMA.empty_table().select(columns)
+        tables = [pq.read_table(p, columns=columns) for p in paths.values()]
+        # unify the per-file dictionaries of `source`
+        return pa.concat_tables(tables, promote_options='permissive').unify_dictionaries()
+
+    def frame(self, sources: Optional[Iterable[str]] = None,
+              columns: Optional[List[str]] = None, with_text: bool = False) -> pd.DataFrame:
+        """pandas DataFrame, one row per article.
+
+        Without explicit columns the long text columns are left out;
+        pass with_text=True or use text() to get them.
+        """
+        if columns is None:
+            columns = [f.name for f in SCHEMA if with_text or f.name not in TEXT_COLUMNS]
+        df = self.table(columns, sources).to_pandas()
+        if 'source' in df:
+            df['source'] = df['source'].astype('category')
+        return df
+
+    def text(self, frame: pd.DataFrame, column: str = 'text') -> pd.Series:
+        """Load one text column for the rows of a frame, aligned to its index"""
+        if column not in TEXT_COLUMNS + ['title']:
+            raise ValueError(f"{column} is not a text column")
+        parts = []
+        for source, rows in frame.groupby('source', observed=True):
+            table = self.table(['article_idx', column], [source])
+            lookup = pd.Series(table.column(column).to_pandas().values,
+                               index=table.column('article_idx').to_numpy())
+            parts.append(pd.Series(lookup.reindex(rows['article_idx']).values, index=rows.index))
+        if not parts:
+            return pd.Series(index=frame.index, dtype=object, name=column)
+        return pd.concat(parts).reindex(frame.index).rename(column)
+
+    def date_report(self, sources: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """How each source's date_published strings parse (see dates.date_report)"""
+        return date_report(self.frame(sources, ['source', 'date_published']))
+
+
+def load(sources: Optional[Iterable[str]] = None, with_text: bool = False,
+         data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """Shortcut for Corpus(data_dir).frame(sources, with_text=with_text)"""
+    return Corpus(data_dir).frame(sources, with_text=with_text)
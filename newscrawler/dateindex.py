@@ -0,0 +1,190 @@
+# Date index of the corpus
+#
+# The notebooks filtered by time with
+# datetime.fromisoformat(a['date_published'].replace('Z', '')) inside list
+# comprehensions, a full scan per query that also broke on CNN's and the
+# Washington Post's non-ISO dates. DateIndex keeps the parsed dates of
+# the corpus (Corpus' `date` column) as int64 epoch seconds sorted by
+# (source, date), plus a directory of where every month starts and ends,
+# so a time slice is two binary searches per source.
+#
+#     from newscrawler.dateindex import DateIndex
+#     index = DateIndex.load_or_build()
+#     index.query('2023-10-07', '2023-11-01', sources=['cnn', 'bbc'])
+#     index.month('2024-05')                       # via the month directory
+#     df[index.mask(df, '2023-10-07', '2023-10-14')]
+#
+# Ranges are half-open, [start, end). Articles without a parseable date are
+# kept out of the sorted arrays and counted in `undated`.
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from newscrawler.corpus import SCHEMA_VERSION, Corpus, month_of
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+DATE_INDEX_DIR = os.path.join(PROJECT_ROOT, 'cache', 'dateindex')
+
+TimeLike = Union[str, pd.Timestamp, 'np.datetime64', int, None]
+
+
+def to_epoch(value: TimeLike) -> Optional[int]:
+    """Timestamp, date string or epoch seconds -> epoch seconds (UTC)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return int(ts.value // 1_000_000_000)
+
+
+class DateIndex:
+    """Article keys sorted by (source, date) with per-source and per-month row ranges."""
+
+    def __init__(self, sources: List[str], source_codes: np.ndarray, article_idx: np.ndarray,
+                 epochs: np.ndarray, undated: Dict[str, int], feeds: Dict[str, str],
+                 schema: int = SCHEMA_VERSION):
+        self.sources = list(sources)
+        self.source_codes = source_codes
+        self.article_idx = article_idx
+        self.epochs = epochs
+        self.undated = undated
+        self.feeds = feeds
+        # corpus schema the dates were parsed under
+        self.schema = schema
+        # sorted by source code, so every source is one contiguous range
+        bounds = np.searchsorted(source_codes, np.arange(len(self.sources) + 1))
+        self.ranges: Dict[str, Tuple[int, int]] = {
+            source: (int(bounds[i]), int(bounds[i + 1])) for i, source in enumerate(self.sources)
+        }
+        self.months = self._month_directory()
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def _month_directory(self) -> pd.DataFrame:
+        """source, month, start, stop: the row range of every month of every source"""
+        if not len(self):
+            return pd.DataFrame(columns=['source', 'month', 'start', 'stop'])
+        months = month_of(pd.Series(pd.to_datetime(self.epochs, unit='s', utc=True))).to_numpy()
+        keys = self.source_codes.astype(np.int64), months
+        change = np.flatnonzero((keys[0][1:] != keys[0][:-1]) | (keys[1][1:] != keys[1][:-1])) + 1
+        starts = np.concatenate([[0], change])
+        stops = np.concatenate([change, [len(self)]])
+        return pd.DataFrame({
+            'source': np.asarray(self.sources, dtype=object)[self.source_codes[starts]],
+            'month': months[starts],
+            'start': starts,
+            'stop': stops,
+        })
+
+    # ─── building ────────────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, corpus: Optional[Corpus] = None,
+              sources: Optional[Iterable[str]] = None) -> 'DateIndex':
+        corpus = corpus or Corpus()
+        selected = sorted(corpus.refresh(sources))
+        table = corpus.table(['source', 'article_idx', 'date'], selected)
+        frame = table.to_pandas()
+        frame['source'] = frame['source'].astype(str)
+        dated = frame['date'].notna()
+        undated = frame.loc[~dated, 'source'].value_counts().reindex(selected, fill_value=0)
+        frame = frame[dated]
+
+        codes = pd.Categorical(frame['source'], categories=selected).codes.astype(np.int32)
+        since_epoch = frame['date'] - pd.Timestamp(0, tz='UTC')
+        epochs = (since_epoch // pd.Timedelta(seconds=1)).to_numpy(np.int64)
+        article_idx = frame['article_idx'].to_numpy(dtype=np.int32)
+        order = np.lexsort((article_idx, epochs, codes))
+        feeds = {source: corpus.feed_hash(source) for source in selected}
+        return cls(selected, codes[order], article_idx[order], epochs[order],
+                   {s: int(n) for s, n in undated.items()}, feeds)
+
+    # ─── persistence ─────────────────────────────────────────────────────────
+    def save(self, directory: str = DATE_INDEX_DIR):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'index.npz')
+        with open(f'{path}.part', 'wb') as f:
+            np.savez(f, source_codes=self.source_codes, article_idx=self.article_idx, epochs=self.epochs)
+        os.replace(f'{path}.part', path)
+        meta_path = os.path.join(directory, 'meta.json')
+        with open(f'{meta_path}.part', 'w') as f:
+            json.dump({'sources': self.sources, 'undated': self.undated, 'feeds': self.feeds,
+                       'schema': self.schema}, f)
+        os.replace(f'{meta_path}.part', meta_path)
+
+    @classmethod
+    def load(cls, directory: str = DATE_INDEX_DIR) -> 'DateIndex':
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        with np.load(os.path.join(directory, 'index.npz')) as arrays:
+            return cls(meta['sources'], arrays['source_codes'], arrays['article_idx'],
+                       arrays['epochs'], meta['undated'], meta['feeds'], meta.get('schema'))
+
+    @classmethod
+    def load_or_build(cls, corpus: Optional[Corpus] = None,
+                      directory: str = DATE_INDEX_DIR) -> 'DateIndex':
+        """The saved index, rebuilt when the set of feeds, any of them or the corpus schema changed"""
+        corpus = corpus or Corpus()
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            index = cls.load(directory)
+            sources = sorted(corpus.refresh())
+            if index.schema == SCHEMA_VERSION and index.sources == sources and all(
+                index.feeds.get(s) == corpus.feed_hash(s) for s in sources
+            ):
+                return index
+        index = cls.build(corpus)
+        index.save(directory)
+        return index
+
+    # ─── queries ─────────────────────────────────────────────────────────────
+    def slices(self, start: TimeLike = None, end: TimeLike = None,
+               sources: Optional[Iterable[str]] = None) -> Dict[str, slice]:
+        """source -> row slice of the articles dated in [start, end)"""
+        start, end = to_epoch(start), to_epoch(end)
+        result = {}
+        for source in (self.sources if sources is None else sources):
+            lo, hi = self.ranges[source]
+            epochs = self.epochs[lo:hi]
+            i = lo if start is None else lo + int(np.searchsorted(epochs, start, 'left'))
+            j = hi if end is None else lo + int(np.searchsorted(epochs, end, 'left'))
+            result[source] = slice(i, max(i, j))
+        return result
+
+    def _frame(self, slices: Iterable[slice]) -> pd.DataFrame:
+        rows = np.concatenate([np.arange(s.start, s.stop) for s in slices] or [np.zeros(0, np.int64)])
+        return pd.DataFrame({
+            'source': pd.Categorical.from_codes(self.source_codes[rows], categories=self.sources),
+            'article_idx': self.article_idx[rows],
+            'date': pd.to_datetime(self.epochs[rows], unit='s', utc=True),
+        })
+
+    def query(self, start: TimeLike = None, end: TimeLike = None,
+              sources: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """source, article_idx and date of the articles in [start, end), by source and date"""
+        return self._frame(self.slices(start, end, sources).values())
+
+    def count(self, start: TimeLike = None, end: TimeLike = None,
+              sources: Optional[Iterable[str]] = None) -> pd.Series:
+        return pd.Series({s: sl.stop - sl.start for s, sl in self.slices(start, end, sources).items()},
+                         dtype=np.int64)
+
+    def month(self, month: Union[str, Iterable[str]],
+              sources: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Articles of one or more 'YYYY-MM' months, straight from the month directory"""
+        months = [month] if isinstance(month, str) else list(month)
+        entries = self.months[self.months['month'].isin(months)]
+        if sources is not None:
+            entries = entries[entries['source'].isin(list(sources))]
+        return self._frame(slice(a, b) for a, b in zip(entries['start'], entries['stop']))
+
+    def mask(self, frame: pd.DataFrame, start: TimeLike = None, end: TimeLike = None) -> np.ndarray:
+        """Boolean mask of the rows of a corpus frame (source, article_idx) dated in [start, end)"""
+        hits = self.query(start, end, frame['source'].astype(str).unique())
+        keys = pd.MultiIndex.from_arrays([frame['source'].astype(str), frame['article_idx']])
+        return keys.isin(pd.MultiIndex.from_arrays([hits['source'].astype(str), hits['article_idx']]))
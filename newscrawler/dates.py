@@ -0,0 +1,278 @@
+# Date normalisation for every outlet's date_published
+#
+# Several spiders store date_published as the page text of a timestamp
+# element, so the corpus mixes ISO strings (Guardian, NBC, CNBC, USA Today)
+# with things like
+#
+#     CNN          Updated 3:41 PM EDT, Sat October 7, 2023
+#     WP           October 7, 2023 at 5:42 p.m. EDT
+#     Daily Mail   Published: 12:34 BST, 7 October 2023
+#     HT           Updated on Oct 07, 2023 05:42 PM IST
+#     NY Post      Published Oct. 7, 2023, 5:42 p.m. ET
+#
+# normalise_dates converts a whole column at once: every distinct string is
+# handled once, and each family of formats (epoch numbers, ISO, month-day-year
+# and day-month-year text with optional time and zone) is a single vectorised
+# pass of precompiled patterns. Strings without a zone are read in the
+# outlet's local time. dateutil only sees what is left over, and only if it
+# contains a year, so relative dates ("2 hours ago") stay NaT instead of
+# becoming today.
+#
+#     from newscrawler.dates import normalise_dates, date_report
+#     df['date'] = normalise_dates(df['date_published'], source='cnn')
+#     date_report(df)          # per-source unparseable rates
+
+import re
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dateutil import parser as dateutil_parser
+from dateutil import tz as dateutil_tz
+
+# Local time of each outlet, for strings that do not name a zone
+SOURCE_TIMEZONES = {
+    'apnews': 'America/New_York',
+    'cnbc': 'America/New_York',
+    'cnn': 'America/New_York',
+    'foxnews': 'America/New_York',
+    'nbcnews': 'America/New_York',
+    'newsweek': 'America/New_York',
+    'nypost': 'America/New_York',
+    'usatoday': 'America/New_York',
+    'washington_post': 'America/New_York',
+    'wp': 'America/New_York',
+    'bbc_spider': 'Europe/London',
+    'bbcnews': 'Europe/London',
+    'dailymail': 'Europe/London',
+    'guardian': 'Europe/London',
+    'independent_uk': 'Europe/London',
+    'theguardian': 'Europe/London',
+    'hindustan_times': 'Asia/Kolkata',
+    'india': 'Asia/Kolkata',
+    'indian_express': 'Asia/Kolkata',
+    'news18': 'Asia/Kolkata',
+}
+
+# Fixed-offset abbreviations, in minutes east of UTC
+TZ_OFFSETS = {
+    'utc': 0, 'gmt': 0, 'z': 0,
+    'edt': -240, 'est': -300, 'cdt': -300, 'cst': -360,
+    'mdt': -360, 'mst': -420, 'pdt': -420, 'pst': -480,
+    'bst': 60, 'cet': 60, 'cest': 120,
+    'ist': 330, 'pkt': 300, 'aest': 600, 'aedt': 660,
+}
+
+# Abbreviations that follow daylight saving time
+TZ_ZONES = {
+    'et': 'America/New_York', 'ct': 'America/Chicago',
+    'mt': 'America/Denver', 'pt': 'America/Los_Angeles',
+}
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+EPOCH = re.compile(r'\d{10}(?:\d{3})?')
+ISO = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?)?\s*(?P<zone>Z|[+-]\d{2}:?\d{2})?',
+                 re.I)
+PREFIX = re.compile(r'^(?:(?:last\s+)?updated|(?:first\s+)?published|posted|modified)(?:\s+on)?\s*:?\s*')
+MONTH_DAY_YEAR = re.compile(r'(?P<mon>[a-z]{3,9})\.?\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<year>\d{4})')
+DAY_MONTH_YEAR = re.compile(r'(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?P<mon>[a-z]{3,9})\.?,?\s+(?P<year>\d{4})')
+# 'z' only ever appears in ISO strings, which never reach ZONE
+ZONE_NAMES = '|'.join(sorted((set(TZ_OFFSETS) | set(TZ_ZONES)) - {'z'}, key=len, reverse=True))
+# HH:MM anywhere; the Guardian's HH.MM only right before a zone or am/pm,
+# where it cannot be a number
+TIME = re.compile(r'(?P<hour>\d{1,2})(?::(?P<minute>\d{2})(?::(?P<second>\d{2}))?'
+                  r'|\.(?P<dot_minute>\d{2})(?=\s*(?:[ap]\.?m\b|(?:' + ZONE_NAMES + r')\b)))'
+                  r'(?:\s*(?P<ampm>[ap])\.?m\b\.?)?')
+# 'gmt+5:30' is an offset, so that branch goes first
+ZONE = re.compile(r'(?:gmt|utc)\s*(?P<offset>[+-]\d{1,2}(?::?\d{2})?)|\b(?P<tz>' + ZONE_NAMES
+                  + r')\b(?!\s*[+-]\d)')
+RELATIVE = re.compile(r'\b(?:ago|yesterday|today|just now)\b', re.I)
+HAS_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+# fuzzy dateutil fills in whatever is missing, so it only sees strings with
+# a month name or a numeric date, and a missing day is the 1st rather than
+# the day of the run
+FALLBACK_DEFAULT = datetime(2000, 1, 1)
+HAS_DATE = re.compile(r'\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?'
+                      r'|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?'
+                      r'|\b\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}\b', re.I)
+
+TZINFOS = {name.upper(): minutes * 60 for name, minutes in TZ_OFFSETS.items()}
+TZINFOS.update({name.upper(): dateutil_tz.gettz(zone) for name, zone in TZ_ZONES.items()})
+
+UTC_TYPE = 'datetime64[ns, UTC]'
+
+METHODS = ['missing', 'epoch', 'iso', 'text', 'fallback', 'failed']
+
+
+def _localise(naive: pd.Series, zones: pd.Series) -> pd.Series:
+    """Naive wall-clock times in per-row IANA zones -> UTC"""
+    result = pd.Series(pd.NaT, index=naive.index, dtype=UTC_TYPE)
+    for zone, rows in naive.groupby(zones, sort=False):
+        stamps = pd.DatetimeIndex(rows).tz_localize(zone, ambiguous='NaT', nonexistent='shift_forward')
+        result.loc[rows.index] = stamps.tz_convert('UTC')
+    return result
+
+
+def _offset_minutes(offsets: pd.Series) -> pd.Series:
+    """'+05:30' / '-4' / '+0100' -> minutes east of UTC"""
+    parts = offsets.str.extract(r'(?P<sign>[+-])(?P<h>\d{1,2}):?(?P<m>\d{2})?')
+    minutes = parts['h'].astype(float) * 60 + parts['m'].fillna(0).astype(float)
+    return minutes.where(parts['sign'] != '-', -minutes)
+
+
+def _parse_iso(strings: pd.Series, default_tz: str) -> pd.Series:
+    zone = strings.str.extract(ISO)['zone']
+    aware = zone.notna()
+    result = pd.Series(pd.NaT, index=strings.index, dtype=UTC_TYPE)
+    if aware.any():
+        result[aware] = pd.to_datetime(strings[aware], format='ISO8601', utc=True, errors='coerce')
+    if (~aware).any():
+        naive = pd.to_datetime(strings[~aware], format='ISO8601', errors='coerce')
+        result[~aware] = _localise(naive, pd.Series(default_tz, index=naive.index))
+    return result
+
+
+def _parse_text(strings: pd.Series, default_tz: str) -> pd.Series:
+    """Month/day/year text with optional time and zone, any order around them"""
+    text = strings.str.lower().str.replace(PREFIX, '', regex=True)
+    date = text.str.extract(MONTH_DAY_YEAR)
+    month = date['mon'].str[:3].map(MONTHS)
+    other = text.str.extract(DAY_MONTH_YEAR)
+    use_other = month.isna()
+    date = date.where(~use_other, other)
+    month = month.where(~use_other, other['mon'].str[:3].map(MONTHS))
+
+    clock = text.str.extract(TIME)
+    hour = clock['hour'].astype(float).fillna(0)
+    pm = clock['ampm'] == 'p'
+    am = clock['ampm'] == 'a'
+    hour = hour.where(~(am | pm), hour % 12 + np.where(pm, 12, 0))
+
+    naive = pd.to_datetime(pd.DataFrame({
+        'year': pd.to_numeric(date['year'], errors='coerce'),
+        'month': month,
+        'day': pd.to_numeric(date['day'], errors='coerce'),
+        'hour': hour,
+        'minute': clock['minute'].fillna(clock['dot_minute']).astype(float).fillna(0),
+        'second': clock['second'].astype(float).fillna(0),
+    }), errors='coerce')
+
+    zone = text.str.extract(ZONE)
+    fixed = zone['tz'].map(TZ_OFFSETS)
+    offsets = _offset_minutes(zone['offset'].fillna('')).where(zone['offset'].notna())
+    fixed = fixed.fillna(offsets)
+    result = pd.Series(pd.NaT, index=strings.index, dtype=UTC_TYPE)
+    has_fixed = fixed.notna() & naive.notna()
+    if has_fixed.any():
+        utc = naive[has_fixed] - pd.to_timedelta(fixed[has_fixed], unit='min')
+        result[has_fixed] = utc.dt.tz_localize('UTC')
+    local = ~has_fixed & naive.notna()
+    if local.any():
+        zones = zone['tz'][local].map(TZ_ZONES).fillna(default_tz)
+        result[local] = _localise(naive[local], zones)
+    return result
+
+
+def _fallback(value: str, default_tz: str):
+    if RELATIVE.search(value) or not HAS_YEAR.search(value) or not HAS_DATE.search(value):
+        return pd.NaT
+    try:
+        parsed = dateutil_parser.parse(value, fuzzy=True, tzinfos=TZINFOS, default=FALLBACK_DEFAULT)
+    except (ValueError, OverflowError):
+        return pd.NaT
+    stamp = pd.Timestamp(parsed)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize(default_tz, ambiguous='NaT', nonexistent='shift_forward')
+    return stamp.tz_convert('UTC')
+
+
+def _normalise_unique(strings: pd.Series, default_tz: str, fallback: bool) -> Tuple[pd.Series, pd.Series]:
+    """Parse distinct strings; returns (UTC dates, method) aligned to strings"""
+    strings = strings.str.strip()
+    result = pd.Series(pd.NaT, index=strings.index, dtype=UTC_TYPE)
+    method = pd.Series('failed', index=strings.index, dtype=object)
+    method[strings == ''] = 'missing'
+
+    epoch = strings.str.fullmatch(EPOCH)
+    if epoch.any():
+        numbers = strings[epoch].astype(np.int64)
+        millis = strings[epoch].str.len() == 13
+        result[epoch] = pd.to_datetime(np.where(millis, numbers, numbers * 1000), unit='ms', utc=True)
+        method[epoch] = 'epoch'
+
+    iso = ~epoch & strings.str.fullmatch(ISO)
+    if iso.any():
+        result[iso] = _parse_iso(strings[iso], default_tz)
+        method[iso & result.notna()] = 'iso'
+
+    todo = result.isna() & (method != 'missing')
+    if todo.any():
+        result[todo] = _parse_text(strings[todo], default_tz)
+        method[todo & result.notna()] = 'text'
+
+    todo = result.isna() & (method != 'missing')
+    if fallback and todo.any():
+        parsed = strings[todo].map(lambda value: _fallback(value, default_tz))
+        result[todo] = pd.to_datetime(parsed, utc=True)
+        method[todo & result.notna()] = 'fallback'
+    return result, method
+
+
+def normalise(values: pd.Series, source: Optional[str] = None, default_tz: Optional[str] = None,
+              fallback: bool = True) -> Tuple[pd.Series, pd.Series]:
+    """normalise_dates plus, per row, how it was parsed (one of METHODS)"""
+    values = pd.Series(values, dtype=object)
+    default_tz = default_tz or SOURCE_TIMEZONES.get(source, 'UTC')
+    codes, uniques = pd.factorize(values)
+    strings = pd.Series(uniques, dtype=object).map(lambda v: v if isinstance(v, str) else str(v))
+    dates, methods = _normalise_unique(strings, default_tz, fallback)
+
+    missing = codes < 0
+    take = np.where(missing, 0, codes)
+    if len(uniques):
+        dates = pd.Series(pd.DatetimeIndex(dates).take(take), index=values.index)
+        methods = pd.Series(methods.to_numpy()[take], index=values.index, dtype=object)
+    else:
+        dates = pd.Series(pd.NaT, index=values.index, dtype=UTC_TYPE)
+        methods = pd.Series('missing', index=values.index, dtype=object)
+    dates[missing] = pd.NaT
+    methods[missing] = 'missing'
+    return dates, methods
+
+
+def normalise_dates(values: pd.Series, source: Optional[str] = None, default_tz: Optional[str] = None,
+                    fallback: bool = True) -> pd.Series:
+    """Raw date_published values -> UTC timestamps (NaT when unparseable).
+
+    `source` picks the outlet's local time for strings without a zone;
+    `default_tz` overrides it. fallback=False skips dateutil entirely.
+    """
+    return normalise(values, source, default_tz, fallback)[0]
+
+
+def date_report(frame: pd.DataFrame, value_column: str = 'date_published',
+                source_column: str = 'source') -> pd.DataFrame:
+    """Per source: how many dates were parsed by which method, and the unparseable rate.
+
+    `example` is one raw string that could not be parsed.
+    """
+    rows = []
+    for source, group in frame.groupby(source_column, observed=True, sort=True):
+        values = group[value_column]
+        _, methods = normalise(values, str(source))
+        counts = methods.value_counts().reindex(METHODS, fill_value=0)
+        present = len(values) - counts['missing']
+        failed = values[methods == 'failed']
+        rows.append({
+            'source': source,
+            'rows': len(values),
+            **counts.to_dict(),
+            'unparseable_rate': counts['failed'] / present if present else 0.0,
+            'example': failed.iloc[0] if len(failed) else None,
+        })
+    return pd.DataFrame(rows, columns=['source', 'rows'] + METHODS + ['unparseable_rate', 'example'])
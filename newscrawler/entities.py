@@ -0,0 +1,180 @@
+# Named entities of the corpus
+#
+# Co_entity_analysis loaded the full en_core_web_sm and ran nlp(text) on one
+# USA Today file in a Python loop, keeping PERSON/ORG/GPE. extract_entities
+# loads the model without the components NER does not need, streams every
+# source's articles through nlp.pipe (long articles chunked by
+# chunking.pipe_long) and writes one row per entity, with character offsets
+# into the article text, to cache/entities/<source>/part-*.parquet.
+#
+#     python -m newscrawler.entities                        # every source
+#     python -m newscrawler.entities cnn bbc --n-process 4
+#
+#     from newscrawler.entities import load_entities
+#     ents = load_entities(['cnn'])
+#
+# Each part file records the article ids it covers and the hash of the feed
+# they came from, so an interrupted run resumes after the last complete part
+# and a new crawl of a source starts that source over.
+
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+from typing import Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import spacy
+
+from newscrawler.chunking import pipe_long
+from newscrawler.corpus import Corpus
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+ENTITY_DIR = os.path.join(PROJECT_ROOT, 'cache', 'entities')
+
+ENTITY_LABELS = ('PERSON', 'ORG', 'GPE')
+
+# NER only needs the tokenizer, the shared tok2vec/transformer and itself
+UNUSED_COMPONENTS = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'senter', 'morphologizer']
+
+SCHEMA = pa.schema([
+    ('source', pa.string()),
+    ('article_idx', pa.int32()),
+    ('entity', pa.string()),
+    ('label', pa.string()),
+    ('start_char', pa.int32()),
+    ('end_char', pa.int32()),
+])
+
+logger = logging.getLogger(__name__)
+
+
+def load_ner(model: str = 'en_core_web_sm', gpu: bool = False):
+    if gpu:
+        spacy.prefer_gpu()
+    return spacy.load(model, exclude=UNUSED_COMPONENTS)
+
+
+def _done_articles(source_dir: str, feed_hash: str) -> set:
+    """Article ids covered by complete parts of the current feed"""
+    done = set()
+    for path in glob.glob(os.path.join(source_dir, 'part-*.parquet')):
+        meta = pq.read_schema(path).metadata or {}
+        if meta.get(b'feed', b'').decode() != feed_hash:
+            # parts of an older crawl; the whole source is redone
+            shutil.rmtree(source_dir)
+            return set()
+        done.update(json.loads(meta[b'articles']))
+    return done
+
+
+def extracted_feed(source: str, out_dir: str = ENTITY_DIR) -> Optional[str]:
+    """Hash of the feed a source's extracted parts came from, None before extraction"""
+    # _done_articles clears older crawls, so all parts of a source share one feed
+    for path in glob.glob(os.path.join(out_dir, source, 'part-*.parquet')):
+        meta = pq.read_schema(path).metadata or {}
+        return meta.get(b'feed', b'').decode()
+    return None
+
+
+def _write_part(source_dir: str, rows: dict, articles: List[int], feed_hash: str):
+    parts = glob.glob(os.path.join(source_dir, 'part-*.parquet'))
+    n = max((int(os.path.basename(p)[5:10]) for p in parts), default=-1) + 1
+    path = os.path.join(source_dir, f'part-{n:05d}.parquet')
+    table = pa.Table.from_pydict(rows, schema=SCHEMA).replace_schema_metadata(
+        {'feed': feed_hash, 'articles': json.dumps(articles)}
+    )
+    pq.write_table(table, f'{path}.part')
+    os.replace(f'{path}.part', path)
+
+
+def extract_source(source: str, nlp, corpus: Optional[Corpus] = None, out_dir: str = ENTITY_DIR,
+                   labels: Optional[Sequence[str]] = ENTITY_LABELS, batch_size: int = 64,
+                   n_process: int = 1, max_tokens: int = 400, checkpoint: int = 1000) -> int:
+    """Entities of one source's articles not extracted yet; returns the number processed.
+
+    labels=None keeps every entity type. A part file is written every
+    `checkpoint` articles.
+    """
+    corpus = corpus or Corpus()
+    feed_hash = corpus.feed_hash(source)
+    source_dir = os.path.join(out_dir, source)
+    done = _done_articles(source_dir, feed_hash) if os.path.isdir(source_dir) else set()
+    os.makedirs(source_dir, exist_ok=True)
+
+    table = corpus.table(['article_idx', 'text'], [source])
+    todo = [
+        (idx, text or '')
+        for idx, text in zip(table.column('article_idx').to_pylist(), table.column('text').to_pylist())
+        if idx not in done
+    ]
+    if done:
+        logger.info(f"{source}: {len(done)} articles already extracted, {len(todo)} to go")
+    keep = None if labels is None else set(labels)
+
+    rows = {field.name: [] for field in SCHEMA}
+    articles = []
+    for idx, doc in pipe_long(nlp, todo, max_tokens, batch_size, n_process):
+        for ent in doc.ents:
+            if keep is None or ent.label_ in keep:
+                rows['source'].append(source)
+                rows['article_idx'].append(idx)
+                rows['entity'].append(ent.text)
+                rows['label'].append(ent.label_)
+                rows['start_char'].append(ent.start_char)
+                rows['end_char'].append(ent.end_char)
+        articles.append(idx)
+        if len(articles) >= checkpoint:
+            _write_part(source_dir, rows, articles, feed_hash)
+            rows = {field.name: [] for field in SCHEMA}
+            articles = []
+    if articles:
+        _write_part(source_dir, rows, articles, feed_hash)
+    logger.info(f"{source}: extracted entities of {len(todo)} articles")
+    return len(todo)
+
+
+def extract_entities(sources: Optional[Iterable[str]] = None, model: str = 'en_core_web_sm',
+                     corpus: Optional[Corpus] = None, out_dir: str = ENTITY_DIR, nlp=None,
+                     **kwargs) -> int:
+    """extract_source for every (selected) source with one loaded model"""
+    corpus = corpus or Corpus()
+    nlp = nlp or load_ner(model)
+    sources = sorted(corpus.refresh(sources))
+    return sum(extract_source(source, nlp, corpus, out_dir, **kwargs) for source in sources)
+
+
+def load_entities(sources: Optional[Iterable[str]] = None, out_dir: str = ENTITY_DIR) -> pd.DataFrame:
+    """Extracted entities as one DataFrame (source and label categorical)"""
+    if sources is None:
+        sources = sorted(d for d in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, d))) \
+            if os.path.isdir(out_dir) else []
+    paths = [p for s in sources for p in sorted(glob.glob(os.path.join(out_dir, s, 'part-*.parquet')))]
+    if not paths:
+        return SCHEMA.empty_table().to_pandas()
+    df = pa.concat_tables(pq.read_table(p, schema=SCHEMA) for p in paths).to_pandas()
+    df['source'] = df['source'].astype('category')
+    df['label'] = df['label'].astype('category')
+    return df
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Named entities of the corpus to Parquet')
+    parser.add_argument('sources', nargs='*', help='corpus sources (default: all)')
+    parser.add_argument('--model', default='en_core_web_sm')
+    parser.add_argument('--labels', nargs='*', default=list(ENTITY_LABELS),
+                        help='entity types to keep; pass --labels alone for all')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--max-tokens', type=int, default=400)
+    parser.add_argument('--gpu', action='store_true')
+    args = parser.parse_args()
+
+    extract_entities(args.sources or None, nlp=load_ner(args.model, args.gpu),
+                     labels=args.labels or None, batch_size=args.batch_size,
+                     n_process=args.n_process, max_tokens=args.max_tokens)
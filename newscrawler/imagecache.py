@@ -0,0 +1,188 @@
+# Pre-decoded image tensor cache
+#
+# The image notebooks used to open every JPEG, resize it to 224x224 and
+# normalise it on every run, and image_caption_analysis decoded the same
+# files again for BLIP and YOLO. build_cache decodes each unique image of
+# the content-addressed store (scripts/image_downloader.py) once into a
+# uint8 N x 224 x 224 x 3 memory-mapped array; ImageTensorCache hands out
+# zero-copy views of it.
+#
+#     python -m newscrawler.imagecache ../data/images ../data/image_cache
+#
+# Layout of the cache directory:
+#     images_224.u8     raw uint8 array, rows in index order
+#     index.json        {"size": 224, "rows": {sha256: row}, "failed": [sha256, ...]}
+
+import json
+import os
+import sys
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+# torchvision's ImageNet statistics, as used by the notebooks' transforms
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def store_images(store_root: str) -> Dict[str, str]:
+    """Map sha256 -> path for every image of a content-addressed store"""
+    images = {}
+    for dirpath, _, filenames in os.walk(store_root):
+        for filename in filenames:
+            sha, ext = os.path.splitext(filename)
+            if len(sha) == 64 and ext.lower() in IMAGE_EXTENSIONS + ('',):
+                images[sha] = os.path.join(dirpath, filename)
+    return images
+
+
+def decode(path: str, size: int = 224) -> Optional[np.ndarray]:
+    """Decode one image to a size x size x 3 uint8 array.
+
+    draft() lets the JPEG decoder downscale by 1/2, 1/4 or 1/8 while
+    decoding, so most of a large photo is never expanded to full size.
+    """
+    try:
+        with Image.open(path) as img:
+            img.draft('RGB', (size, size))
+            img = img.convert('RGB').resize((size, size), Image.BILINEAR)
+            return np.asarray(img, dtype=np.uint8)
+    except Exception:
+        return None
+
+
+def _decode_job(job: Tuple[str, str, int]) -> Tuple[str, Optional[bytes]]:
+    sha, path, size = job
+    array = decode(path, size)
+    return sha, None if array is None else array.tobytes()
+
+
+def _open(path: str, rows: int, size: int, mode: str) -> np.memmap:
+    return np.memmap(path, dtype=np.uint8, mode=mode, shape=(max(rows, 1), size, size, 3))
+
+
+def build_cache(store_root: str, cache_dir: str, size: int = 224,
+                workers: Optional[int] = None) -> Dict[str, object]:
+    """Decode the store's images that are not cached yet and append them.
+
+    Existing rows are never rewritten, so rerunning after new downloads
+    only decodes the new images. Returns the updated index.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = os.path.join(cache_dir, 'index.json')
+    data_path = os.path.join(cache_dir, f'images_{size}.u8')
+
+    index = {'size': size, 'rows': {}, 'failed': []}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if index['size'] != size:
+            raise ValueError(f"{cache_dir} holds {index['size']}px images, not {size}px")
+
+    failed = set(index['failed'])
+    todo = [(sha, path, size) for sha, path in sorted(store_images(store_root).items())
+            if sha not in index['rows'] and sha not in failed]
+    if not todo:
+        return index
+
+    # Grow the file once for all new rows, then fill them in place
+    start = len(index['rows'])
+    row_bytes = size * size * 3
+    with open(data_path, 'ab') as f:
+        f.truncate((start + len(todo)) * row_bytes)
+    array = _open(data_path, start + len(todo), size, 'r+')
+
+    row = start
+    with Pool(workers) as pool:
+        for sha, data in pool.imap(_decode_job, todo, chunksize=16):
+            if data is None:
+                failed.add(sha)
+                continue
+            array[row] = np.frombuffer(data, dtype=np.uint8).reshape(size, size, 3)
+            index['rows'][sha] = row
+            row += 1
+    array.flush()
+    del array
+
+    # Undecodable images leave no gap behind
+    with open(data_path, 'r+b') as f:
+        f.truncate(row * row_bytes)
+
+    index['failed'] = sorted(failed)
+    tmp_path = f'{index_path}.part'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+class ImageTensorCache:
+    """Read-only access to a cache written by build_cache.
+
+    array[i] and contiguous slices are views into the memory map; nothing is
+    decoded or copied until a model actually consumes the pixels.
+    """
+
+    def __init__(self, cache_dir: str):
+        with open(os.path.join(cache_dir, 'index.json')) as f:
+            index = json.load(f)
+        self.size = index['size']
+        self.rows = index['rows']
+        self.failed = set(index['failed'])
+        if self.rows:
+            self.array = _open(os.path.join(cache_dir, f'images_{self.size}.u8'),
+                               len(self.rows), self.size, 'r')
+        else:
+            self.array = np.zeros((0, self.size, self.size, 3), dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, sha: str) -> bool:
+        return sha in self.rows
+
+    def __getitem__(self, sha: str) -> np.ndarray:
+        """size x size x 3 uint8 view of one image"""
+        return self.array[self.rows[sha]]
+
+    def row_ids(self, shas: Iterable[str]) -> List[int]:
+        return [self.rows[sha] for sha in shas if sha in self.rows]
+
+    def batch(self, shas: Iterable[str]) -> np.ndarray:
+        """N x size x size x 3 uint8 array; a view when the rows are contiguous"""
+        rows = self.row_ids(shas)
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return self.array[rows[0]:rows[-1] + 1]
+        return self.array[rows]
+
+    def image(self, sha: str) -> Image.Image:
+        """PIL image for pipelines that want one (BLIP processor, YOLO)"""
+        return Image.fromarray(self[sha])
+
+    def tensor(self, shas: Iterable[str], normalize: bool = True, device: str = 'cpu'):
+        """N x 3 x size x size float tensor, normalised like the notebooks'
+        T.ToTensor() + T.Normalize(ImageNet mean/std).
+
+        The uint8 batch is wrapped without copying and only converted on
+        the target device.
+        """
+        import torch
+
+        batch = torch.from_numpy(np.ascontiguousarray(self.batch(shas))).to(device)
+        batch = batch.permute(0, 3, 1, 2).float().div_(255)
+        if normalize:
+            mean = torch.from_numpy(MEAN).to(device).view(1, 3, 1, 1)
+            std = torch.from_numpy(STD).to(device).view(1, 3, 1, 1)
+            batch = batch.sub_(mean).div_(std)
+        return batch
+
+
+if __name__ == '__main__':
+    store_root = sys.argv[1] if len(sys.argv) > 1 else '../data/images'
+    cache_dir = sys.argv[2] if len(sys.argv) > 2 else '../data/image_cache'
+    result = build_cache(store_root, cache_dir)
+    print(f"{len(result['rows'])} images cached, {len(result['failed'])} undecodable")
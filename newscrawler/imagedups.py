@@ -0,0 +1,242 @@
+# Near-duplicate images across outlets
+#
+# The same agency photo shows up cropped, recompressed or resized at CNN,
+# NY Post, Hindustan Times and others, and every copy used to go through
+# BLIP, YOLO and the sentiment models. This module computes a 64-bit pHash
+# and dHash for every image of the tensor cache (newscrawler.imagecache),
+# finds all pairs within a Hamming distance through a multi-index hash
+# table, and clusters them, so analyses can run once per cluster and
+# broadcast their results to every member.
+#
+#     python -m newscrawler.imagedups ../data/image_cache ../data/image_clusters.json
+
+import json
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from newscrawler.imagecache import ImageTensorCache
+
+# popcount of every byte value, for Hamming distances on uint64 arrays
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+_GRAY = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Elementwise Hamming distance between two uint64 arrays"""
+    x = np.bitwise_xor(a, b)
+    return _POPCOUNT[x.view(np.uint8)].reshape(*x.shape, 8).sum(axis=-1)
+
+
+def _area_resize(gray: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Box-filter downscale of an N x H x W batch (antialiased like PIL)"""
+    rows = np.linspace(0, gray.shape[1], height + 1).astype(int)
+    cols = np.linspace(0, gray.shape[2], width + 1).astype(int)
+    out = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=1), cols[:-1], axis=2)
+    return out / np.outer(np.diff(rows), np.diff(cols))
+
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+    """N x 64 booleans -> N uint64, first bit most significant"""
+    return np.packbits(bits, axis=1).view('>u8').astype(np.uint64).ravel()
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2)
+    return (m * np.sqrt(2 / n)).astype(np.float32)
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def image_hashes(batch: np.ndarray):
+    """pHash and dHash (uint64 each) for an N x H x W x 3 uint8 batch.
+
+    pHash: sign of the 8x8 lowest frequencies of a 32x32 DCT against their
+    median; dHash: horizontal gradient signs of a 9x8 thumbnail. Both are
+    computed for the whole batch with array operations.
+    """
+    gray = batch.astype(np.float32) @ _GRAY
+
+    small = _area_resize(gray, 32, 32)
+    dct = _DCT32 @ small @ _DCT32.T
+    low = dct[:, :8, :8].reshape(len(batch), 64)
+    phash = _pack(low > np.median(low, axis=1, keepdims=True))
+
+    thumb = _area_resize(gray, 8, 9)
+    dhash = _pack((thumb[:, :, 1:] > thumb[:, :, :-1]).reshape(len(batch), 64))
+    return phash, dhash
+
+
+def hash_cache(cache: ImageTensorCache, batch_size: int = 1024):
+    """(shas, phash, dhash) for every image of a tensor cache, in row order"""
+    shas = sorted(cache.rows, key=cache.rows.get)
+    phash = np.empty(len(shas), dtype=np.uint64)
+    dhash = np.empty(len(shas), dtype=np.uint64)
+    for start in range(0, len(shas), batch_size):
+        stop = min(start + batch_size, len(shas))
+        phash[start:stop], dhash[start:stop] = image_hashes(cache.array[start:stop])
+    return shas, phash, dhash
+
+
+class MultiIndex:
+    """Multi-index hashing: all pairs of 64-bit hashes within `threshold` bits.
+
+    The hash is cut into `bands` substrings. If two hashes differ in at most
+    `threshold` bits, then by the pigeonhole principle they differ in at most
+    threshold // bands bits on at least one band. So each band is sorted once,
+    and every hash only looks up the band values within that radius of its
+    own (1 + 21 + 210 lookups per 21-bit band for a radius of 2). Only those
+    candidates are compared on the full hash, and the cost grows with the
+    number of near collisions rather than with N².
+
+    By default bands are about log2(N) bits wide, so a band value is shared
+    by about one other hash even for millions of images.
+    """
+
+    def __init__(self, hashes: np.ndarray, threshold: int = 8, bands: Optional[int] = None):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.threshold = threshold
+        if bands is None:
+            bits = max(1.0, np.log2(max(len(self.hashes), 2)))
+            bands = int(np.clip(round(64 / bits), 2, threshold + 1))
+        self.radius = threshold // bands
+        edges = np.linspace(0, 64, bands + 1).astype(int)
+        self.bands = list(zip(edges[:-1], edges[1:]))
+
+    def _band(self, lo: int, hi: int) -> np.ndarray:
+        mask = np.uint64((1 << (hi - lo)) - 1)
+        return ((self.hashes >> np.uint64(64 - hi)) & mask).astype(np.int64)
+
+    def _flips(self, width: int) -> List[int]:
+        """Every xor mask of at most `radius` bits within one band"""
+        masks = [0]
+        for _ in range(self.radius):
+            masks = sorted({m | (1 << b) for m in masks for b in range(width)} | set(masks))
+        return masks
+
+    def pairs(self) -> np.ndarray:
+        """M x 2 array of index pairs (i < j) within the threshold"""
+        found = []
+        for lo, hi in self.bands:
+            values = self._band(lo, hi)
+            order = np.argsort(values, kind='stable')
+            uniq, starts, counts = np.unique(values[order], return_index=True, return_counts=True)
+
+            # band value -> group id; a dense table while it stays small
+            if hi - lo <= 24:
+                table = np.full(1 << (hi - lo), -1, dtype=np.int64)
+                table[uniq] = np.arange(len(uniq))
+                lookup = table.__getitem__
+            else:
+                def lookup(query):
+                    pos = np.minimum(np.searchsorted(uniq, query), len(uniq) - 1)
+                    return np.where(uniq[pos] == query, pos, -1)
+
+            for mask in self._flips(hi - lo):
+                other = lookup(uniq ^ mask)
+                # each unordered pair of groups once; mask 0 pairs a group
+                # with itself
+                groups = np.flatnonzero((other > np.arange(len(uniq))) if mask
+                                        else counts > 1)
+                if not len(groups):
+                    continue
+                a, b = self._expand(order, starts, counts, groups, other[groups])
+                keep = a != b
+                a, b = np.minimum(a[keep], b[keep]), np.maximum(a[keep], b[keep])
+                close = hamming(self.hashes[a], self.hashes[b]) <= self.threshold
+                found.append(np.stack([a[close], b[close]], axis=1))
+        if not found:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(found), axis=0)
+
+    @staticmethod
+    def _expand(order, starts, counts, left, right):
+        """All (member of left[k], member of right[k]) index pairs"""
+        n_left, n_right = counts[left], counts[right]
+        sizes = n_left * n_right
+        k = np.repeat(np.arange(len(left)), sizes)
+        offset = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        a = order[starts[left][k] + offset // n_right[k]]
+        b = order[starts[right][k] + offset % n_right[k]]
+        return a, b
+
+
+def cluster(n: int, pairs: np.ndarray) -> np.ndarray:
+    """Union-find over pairs; returns the root (smallest member) of each item"""
+    parent = np.arange(n)
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    return np.array([find(i) for i in range(n)])
+
+
+def near_duplicates(shas: List[str], phash: np.ndarray, dhash: np.ndarray,
+                    threshold: int = 8, dhash_threshold: Optional[int] = 16) -> Dict[str, str]:
+    """Map every sha256 to the representative sha256 of its cluster.
+
+    Pairs are found on pHash and, when dhash_threshold is set, must also be
+    within that distance on dHash, which removes most chance collisions of
+    flat or low-detail images.
+    """
+    pairs = MultiIndex(phash, threshold).pairs()
+    if dhash_threshold is not None and len(pairs):
+        pairs = pairs[hamming(dhash[pairs[:, 0]], dhash[pairs[:, 1]]) <= dhash_threshold]
+    roots = cluster(len(shas), pairs)
+    return {sha: shas[root] for sha, root in zip(shas, roots)}
+
+
+def representatives(shas: Iterable[str], clusters: Dict[str, str]) -> List[str]:
+    """The distinct cluster representatives for a set of images, in first-seen order"""
+    return list(dict.fromkeys(clusters.get(sha, sha) for sha in shas))
+
+
+def broadcast(results: Dict[str, object], shas: Iterable[str],
+              clusters: Dict[str, str]) -> Dict[str, object]:
+    """Expand per-representative results back to every image"""
+    return {sha: results[clusters.get(sha, sha)] for sha in shas
+            if clusters.get(sha, sha) in results}
+
+
+def build_index(cache_dir: str, out_path: str, threshold: int = 8,
+                dhash_threshold: Optional[int] = 16) -> Dict[str, Dict[str, str]]:
+    """Hash every cached image and write {sha: {phash, dhash, cluster}} to out_path"""
+    shas, phash, dhash = hash_cache(ImageTensorCache(cache_dir))
+    clusters = near_duplicates(shas, phash, dhash, threshold, dhash_threshold)
+    index = {
+        sha: {'phash': f'{int(p):016x}', 'dhash': f'{int(d):016x}', 'cluster': clusters[sha]}
+        for sha, p, d in zip(shas, phash, dhash)
+    }
+    tmp_path = f'{out_path}.part'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, out_path)
+    return index
+
+
+def load_clusters(path: str) -> Dict[str, str]:
+    with open(path) as f:
+        return {sha: entry['cluster'] for sha, entry in json.load(f).items()}
+
+
+if __name__ == '__main__':
+    cache_dir = sys.argv[1] if len(sys.argv) > 1 else '../data/image_cache'
+    out_path = sys.argv[2] if len(sys.argv) > 2 else '../data/image_clusters.json'
+    index = build_index(cache_dir, out_path)
+    n_clusters = len({entry['cluster'] for entry in index.values()})
+    print(f"{len(index)} images in {n_clusters} clusters")
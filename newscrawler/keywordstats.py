@@ -0,0 +1,73 @@
+# Crawl-time keyword statistics
+#
+# find_matches only says which keywords occur somewhere in an article. The
+# analyses also need how often each keyword occurs, where it first occurs and
+# whether it is in the headline or the body, and used to re-scan the full
+# text for that. KeywordCounter computes all of it while the article is still
+# in memory, with one regex scan per text field.
+
+import re
+from typing import Dict, List
+
+
+class KeywordCounter:
+    """Counts a spider's KEYWORDS in each text field of an article.
+
+    Every keyword is counted independently, exactly like the per-keyword
+    \\b...\\b patterns used by find_matches: 'israeli defence force' counts
+    both for itself and for 'israeli'. All keywords are combined into one
+    zero-width alternation (longest first) so each start position of the text
+    is tried once, and keywords that are a word-prefix of a longer match are
+    credited from a precomputed table.
+    """
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.keywords = sorted(
+            {k.lower() for words in keywords.values() for k in words},
+            key=len, reverse=True
+        )
+        alternatives = '|'.join(re.escape(k) for k in self.keywords)
+        self.pattern = re.compile(rf'(?=\b({alternatives})\b)', re.IGNORECASE)
+
+        # keyword -> shorter keywords it starts with on a word boundary,
+        # which the scan cannot report separately at the same position
+        self.prefixes = {
+            k: [p for p in self.keywords
+                if p != k and re.match(rf'{re.escape(p)}\b', k)]
+            for k in self.keywords
+        }
+
+    def count(self, text: str) -> Dict[str, List[int]]:
+        """Map keyword -> [count, first offset] for one text field"""
+        found = {}
+        if not text:
+            return found
+        for match in self.pattern.finditer(text):
+            keyword = match.group(1).lower()
+            for k in (keyword, *self.prefixes[keyword]):
+                if k in found:
+                    found[k][0] += 1
+                else:
+                    found[k] = [1, match.start()]
+        return found
+
+    def stats(self, **fields: str) -> Dict[str, object]:
+        """Compact statistics block for an article's text fields.
+
+        {'word_count': {'title': 11, 'text': 812},
+         'keywords': {'gaza': {'count': 15, 'title': 1, 'text': 14,
+                               'first_offset': {'title': 0, 'text': 57}}}}
+        Fields without a keyword are left out of a keyword's entry.
+        """
+        word_count = {}
+        keywords = {}
+        for field, text in fields.items():
+            text = text or ''
+            word_count[field] = len(text.split())
+            for keyword, (count, offset) in self.count(text).items():
+                entry = keywords.setdefault(keyword, {'count': 0, 'first_offset': {}})
+                entry['count'] += count
+                entry[field] = count
+                entry['first_offset'][field] = offset
+
+        return {'word_count': word_count, 'keywords': keywords}
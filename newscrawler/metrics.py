@@ -0,0 +1,88 @@
+# Corpus-wide article metrics
+#
+# The per-source tables of "News Article Analysis" came from a single-core
+# loop running one re.findall per metric per article. compute_metrics runs
+# textfeatures.FeatureExtractor (one tokenisation per article, all lexicons
+# answered from it) over the Parquet corpus, one source per worker process,
+# and returns a tidy DataFrame.
+#
+#     from newscrawler.metrics import compute_metrics, summarise
+#     tidy = compute_metrics(lexicons={**DEFAULT_LEXICONS, 'ceasefire': ['ceasefire']})
+#     summarise(tidy)
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from newscrawler.corpus import Corpus
+from newscrawler.textfeatures import DEFAULT_LEXICONS, FeatureExtractor
+
+ID_COLUMNS = ['source', 'article_idx']
+
+
+def source_metrics(source: str, corpus: Optional[Corpus] = None,
+                   lexicons: Optional[Dict[str, List[str]]] = None) -> pd.DataFrame:
+    """Wide metrics frame for one source.
+
+    Runs inside the worker processes: the caller's Corpus (just its
+    settings) is pickled and each worker reads its own source's text from
+    the Parquet cache, so no article text is pickled between processes.
+    """
+    corpus = corpus or Corpus()
+    extractor = FeatureExtractor(lexicons)
+    table = corpus.table(['article_idx', 'title', 'text', 'images'], [source])
+    titles = table.column('title').to_pylist()
+    texts = table.column('text').to_pylist()
+    images = table.column('images').to_pylist()
+
+    rows = [
+        extractor.compute(title, text, len(imgs or []))
+        for title, text, imgs in zip(titles, texts, images)
+    ]
+    df = pd.DataFrame.from_records(rows)
+    df.insert(0, 'article_idx', table.column('article_idx').to_numpy())
+    df.insert(0, 'source', source)
+    return df
+
+
+def compute_metrics(corpus: Optional[Corpus] = None, sources: Optional[Iterable[str]] = None,
+                    lexicons: Optional[Dict[str, List[str]]] = None,
+                    processes: Optional[int] = None, tidy: bool = True) -> pd.DataFrame:
+    """Metrics for every article of the selected sources.
+
+    tidy=True returns one row per (source, article_idx, metric) with a
+    `value` column; tidy=False one row per article and one column per
+    metric. processes=1 runs in-process.
+    """
+    corpus = corpus or Corpus()
+    # convert stale feeds up front so workers never race on the cache
+    sources = sorted(corpus.refresh(sources))
+    lexicons = DEFAULT_LEXICONS if lexicons is None else lexicons
+
+    if processes == 1 or len(sources) <= 1:
+        parts = [source_metrics(s, corpus, lexicons) for s in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(source_metrics, s, corpus, lexicons)
+                for s in sources
+            ]
+            parts = [f.result() for f in futures]
+
+    if not parts:
+        return pd.DataFrame(columns=ID_COLUMNS + (['metric', 'value'] if tidy else []))
+    wide = pd.concat(parts, ignore_index=True)
+    wide['source'] = wide['source'].astype('category')
+    if not tidy:
+        return wide
+    return wide.melt(id_vars=ID_COLUMNS, var_name='metric', value_name='value')
+
+
+def summarise(tidy: pd.DataFrame, stat: str = 'mean') -> pd.DataFrame:
+    """Per-source table (sources x metrics) plus the article count"""
+    table = tidy.pivot_table(index='source', columns='metric', values='value',
+                             aggfunc=stat, observed=True)
+    counts = tidy.groupby('source', observed=True)['article_idx'].nunique()
+    table.insert(0, 'total_articles', counts)
+    return table
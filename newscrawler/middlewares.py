@@ -3,6 +3,8 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import re
+
 from scrapy import signals
 
 # useful for handling different item types with a single interface
@@ -101,3 +103,96 @@ class NewscrawlerDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class AmpDownloaderMiddleware:
+    """Fetch the AMP/lite variant of article pages instead of the full page.
+
+    Only active for spiders started with `-a amp=1` that declare an
+    AMP_URL_RULE = (pattern, replacement) for their article urls. The full
+    page is fetched instead whenever the AMP variant fails, and the rewrite
+    is switched off for the rest of the run if it keeps failing.
+    """
+
+    def __init__(self, stats, max_failures):
+        self.stats = stats
+        self.max_failures = max_failures
+        self.failures = {}
+        self.rules = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats, crawler.settings.getint('AMP_MAX_FAILURES', 20))
+
+    def _rule(self, spider):
+        if spider.name not in self.rules:
+            enabled = str(getattr(spider, 'amp', '')).lower() in ('1', 'true', 'yes')
+            rule = getattr(spider, 'AMP_URL_RULE', None)
+            self.rules[spider.name] = (re.compile(rule[0]), rule[1]) if enabled and rule else None
+        return self.rules[spider.name]
+
+    def process_request(self, request, spider):
+        rule = self._rule(spider)
+        if rule is None or 'amp_original_url' in request.meta or request.meta.get('amp_skip'):
+            return None
+        if getattr(request.callback, '__name__', None) != 'parse_article':
+            return None
+
+        pattern, replacement = rule
+        amp_url, n = pattern.subn(replacement, request.url, count=1)
+        if not n or amp_url == request.url:
+            return None
+
+        self.stats.inc_value('amp/requests', spider=spider)
+        meta = dict(request.meta, amp_original_url=request.url)
+        return request.replace(url=amp_url, meta=meta, dont_filter=True)
+
+    def process_response(self, request, response, spider):
+        if 'amp_original_url' not in request.meta:
+            self._check_advertised(request, response, spider)
+            return response
+        if response.status != 200:
+            return self._fallback(request, spider, f"HTTP {response.status}")
+
+        self.failures[spider.name] = 0
+        self.stats.inc_value('amp/responses', spider=spider)
+        self.stats.inc_value('amp/response_bytes', len(response.body), spider=spider)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        if 'amp_original_url' not in request.meta:
+            return None
+        return self._fallback(request, spider, repr(exception))
+
+    def _fallback(self, request, spider, reason):
+        original_url = request.meta['amp_original_url']
+        spider.logger.info(f"AMP fetch failed ({reason}), falling back to {original_url}")
+        self.stats.inc_value('amp/fallbacks', spider=spider)
+
+        self.failures[spider.name] = self.failures.get(spider.name, 0) + 1
+        if self.failures[spider.name] >= self.max_failures and self.rules.get(spider.name):
+            spider.logger.warning(
+                f"AMP rewrite disabled after {self.failures[spider.name]} consecutive failures"
+            )
+            self.rules[spider.name] = None
+
+        meta = {k: v for k, v in request.meta.items() if k not in ('amp_original_url', 'retry_times')}
+        meta['amp_skip'] = True
+        return request.replace(url=original_url, meta=meta, dont_filter=True)
+
+    def _check_advertised(self, request, response, spider):
+        # Compare the page's own <link rel="amphtml"> with what the rule would
+        # have produced, so a stale AMP_URL_RULE shows up in the stats
+        rule = self._rule(spider)
+        if rule is None or getattr(request.callback, '__name__', None) != 'parse_article':
+            return
+        if b'amphtml' not in response.body or not hasattr(response, 'xpath'):
+            return
+
+        advertised = response.xpath('//link[@rel="amphtml"]/@href').get()
+        if not advertised:
+            return
+        pattern, replacement = rule
+        if pattern.sub(replacement, request.url, count=1) != response.urljoin(advertised):
+            self.stats.inc_value('amp/rule_mismatch', spider=spider)
+            spider.logger.debug(f"Page advertises AMP url {advertised} not matched by AMP_URL_RULE")
@@ -0,0 +1,204 @@
+# Persistent cache of parsed documents
+#
+# The co-entity notebook ran nlp(art['text']) for NER, the voice notebooks
+# parsed the same articles again with en_core_web_trf, and the death-word
+# analyses re-split them into sentences. ParseCache keeps every parse as
+# spaCy DocBin shards under cache/parses/<pipeline>/, keyed by the sha256
+# of the article text, so the model runs once per article per pipeline and
+# later analyses read tags, dependencies, entities and sentences back from
+# disk.
+#
+#     from newscrawler.parsecache import ParseCache
+#     cache = ParseCache(spacy.load('en_core_web_trf'))
+#     for key, doc in cache.parse(corpus_docs('india')):  # parses only new texts
+#         ...
+#     for doc in cache.iter_docs():                        # everything cached, no model
+#         ...
+#
+# parse() works through its input shard_size texts at a time, so results
+# stream out as they are ready and only one batch of Docs is in memory.
+# Lookups load whole shards: get_many() reads each shard it needs once,
+# while get() keeps the last max_shards shards and suits texts looked up
+# roughly in the order they were parsed.
+#
+# The pipeline directory name covers the model, its version, the enabled
+# components, the spaCy version and the chunk size, so changing any of them
+# starts a new cache rather than mixing parses.
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import spacy
+from spacy.tokens import Doc, DocBin
+
+from newscrawler.chunking import pipe_long
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+PARSE_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'parses')
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def pipeline_id(nlp, max_tokens: int) -> str:
+    """Directory name identifying everything that shapes a parse"""
+    meta = nlp.meta
+    config = json.dumps({
+        'pipes': nlp.pipe_names,
+        'spacy': spacy.__version__,
+        'max_tokens': max_tokens,
+    }, sort_keys=True)
+    digest = hashlib.sha256(config.encode('utf-8')).hexdigest()[:12]
+    return f"{meta.get('lang', 'xx')}_{meta.get('name', 'pipeline')}-{meta.get('version', '0')}-{digest}"
+
+
+class ParseCache:
+    """DocBin shards of parsed articles for one pipeline.
+
+    index.jsonl maps each text hash to (shard, position); shards are written
+    whole and atomically, and their index rows appended afterwards, so an
+    interrupted run at worst leaves an unindexed shard that is overwritten
+    next time.
+    """
+
+    def __init__(self, nlp, directory: str = PARSE_CACHE_DIR, shard_size: int = 1000,
+                 max_tokens: int = 400, batch_size: int = 32, n_process: int = 1,
+                 max_shards: int = 2):
+        self.nlp = nlp
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.shard_size = shard_size
+        self.max_shards = max_shards
+        self.directory = os.path.join(directory, pipeline_id(nlp, max_tokens))
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, 'index.jsonl')
+        self.index: Dict[str, Tuple[int, int]] = {}
+        if os.path.exists(self.index_path):
+            line = '\n'
+            with open(self.index_path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue   # blank or torn last line after a crash
+                    self.index[row['hash']] = (row['shard'], row['pos'])
+            if not line.endswith('\n'):
+                # start the next row on a line of its own
+                with open(self.index_path, 'a') as f:
+                    f.write('\n')
+        self._loaded: 'OrderedDict[int, List[Doc]]' = OrderedDict()
+
+    def __contains__(self, text: str) -> bool:
+        return text_hash(text) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def shards(self) -> List[int]:
+        return sorted({shard for shard, _ in self.index.values()})
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f'shard-{shard:05d}.spacy')
+
+    def _write_shard(self, hashes: List[str], docs: List[Doc]):
+        shard = max(self.shards, default=-1) + 1
+        # user_data holds transformer activations; tags, parse, entities and
+        # sentence boundaries are all token attributes
+        doc_bin = DocBin(store_user_data=False, docs=docs)
+        path = self._shard_path(shard)
+        doc_bin.to_disk(f'{path}.part')
+        os.replace(f'{path}.part', path)
+        with open(self.index_path, 'a') as f:
+            for pos, digest in enumerate(hashes):
+                f.write(json.dumps({'hash': digest, 'shard': shard, 'pos': pos}) + '\n')
+                self.index[digest] = (shard, pos)
+        logger.info(f"Wrote {len(docs)} parses to {path}")
+
+    def _shard_docs(self, shard: int) -> List[Doc]:
+        if shard not in self._loaded:
+            doc_bin = DocBin().from_disk(self._shard_path(shard))
+            self._loaded[shard] = list(doc_bin.get_docs(self.nlp.vocab))
+            while len(self._loaded) > self.max_shards:
+                self._loaded.popitem(last=False)
+        return self._loaded[shard]
+
+    def get(self, text: str) -> Optional[Doc]:
+        location = self.index.get(text_hash(text))
+        if location is None:
+            return None
+        shard, pos = location
+        return self._shard_docs(shard)[pos]
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[Doc]]:
+        """Cached Docs of many texts, in order, reading each shard once"""
+        wanted: Dict[int, List[Tuple[int, int]]] = {}
+        for i, text in enumerate(texts):
+            location = self.index.get(text_hash(text))
+            if location is not None:
+                wanted.setdefault(location[0], []).append((i, location[1]))
+        result: List[Optional[Doc]] = [None] * len(texts)
+        for shard, hits in sorted(wanted.items()):
+            docs = self._loaded.get(shard)
+            if docs is None:
+                docs = list(DocBin().from_disk(self._shard_path(shard)).get_docs(self.nlp.vocab))
+            for i, pos in hits:
+                result[i] = docs[pos]
+        return result
+
+    def _missing(self, docs: Iterable[Tuple[str, str]], seen: set) -> Iterator[Tuple[str, str]]:
+        for key, text in docs:
+            digest = text_hash(text)
+            if digest not in self.index and digest not in seen:
+                seen.add(digest)
+                yield digest, text
+
+    def update(self, docs: Iterable[Tuple[str, str]]) -> int:
+        """Parse and store every (key, text) whose text is not cached yet"""
+        hashes, parsed, total = [], [], 0
+        for digest, doc in pipe_long(self.nlp, self._missing(docs, set()), self.max_tokens,
+                                     self.batch_size, self.n_process):
+            hashes.append(digest)
+            parsed.append(doc)
+            if len(parsed) >= self.shard_size:
+                self._write_shard(hashes, parsed)
+                total += len(parsed)
+                hashes, parsed = [], []
+        if parsed:
+            self._write_shard(hashes, parsed)
+            total += len(parsed)
+        return total
+
+    def parse(self, docs: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, Doc]]:
+        """(key, Doc) for every (key, text), running the model only on new texts.
+
+        Works shard_size texts at a time: the new texts of a batch are parsed
+        and written as one shard, then the whole batch is yielded in order.
+        """
+        docs = iter(docs)
+        while True:
+            batch = list(islice(docs, self.shard_size))
+            if not batch:
+                return
+            fresh = dict(pipe_long(self.nlp, self._missing(batch, set()), self.max_tokens,
+                                   self.batch_size, self.n_process))
+            # looked up before the new shard is indexed, so it is not read back
+            cached = self.get_many([text for _, text in batch])
+            if fresh:
+                self._write_shard(list(fresh), list(fresh.values()))
+            for (key, text), doc in zip(batch, cached):
+                yield key, doc if doc is not None else fresh[text_hash(text)]
+
+    def iter_docs(self) -> Iterator[Doc]:
+        """Every cached Doc, shard by shard, without touching the model"""
+        for shard in self.shards:
+            yield from DocBin().from_disk(self._shard_path(shard)).get_docs(self.nlp.vocab)
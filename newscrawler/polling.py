@@ -0,0 +1,82 @@
+# Helpers for the long-running feed monitor (spiders/monitor_spider.py)
+
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class BoundedSet:
+    """Set that forgets its oldest entries beyond maxlen.
+
+    Stands in for the spiders' visited_pages / seen sets so a monitor that
+    runs for weeks keeps a fixed memory footprint. Entries that are looked
+    up again are kept fresh, so urls that keep reappearing in a feed are
+    not forgotten.
+    """
+
+    def __init__(self, maxlen: int = 50000):
+        self.maxlen = maxlen
+        self._items = OrderedDict()
+
+    def __contains__(self, item: Hashable) -> bool:
+        if item in self._items:
+            self._items.move_to_end(item)
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Hashable):
+        self._items[item] = None
+        self._items.move_to_end(item)
+        while len(self._items) > self.maxlen:
+            self._items.popitem(last=False)
+
+    def discard(self, item: Hashable):
+        self._items.pop(item, None)
+
+
+class FeedState:
+    """Adaptive polling schedule for one feed url.
+
+    Feeds that keep producing new articles are polled more often (down to
+    min_interval); quiet or failing feeds back off towards max_interval.
+    """
+
+    def __init__(self, url: str, outlet: str, min_interval: float = 60,
+                 max_interval: float = 900):
+        self.url = url
+        self.outlet = outlet
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.next_poll = 0.0
+        self.in_flight = False
+        self.polls = 0
+        self.errors = 0
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return not self.in_flight and now >= self.next_poll
+
+    def started(self):
+        self.in_flight = True
+        self.polls += 1
+
+    def finished(self, new_articles: int, now: Optional[float] = None):
+        if new_articles:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self._schedule(now)
+
+    def failed(self, now: Optional[float] = None):
+        self.errors += 1
+        self.interval = min(self.max_interval, self.interval * 2)
+        self._schedule(now)
+
+    def _schedule(self, now: Optional[float]):
+        now = time.time() if now is None else now
+        self.in_flight = False
+        self.next_poll = now + self.interval
@@ -0,0 +1,271 @@
+# Content-addressed cache for analysis results
+#
+# The analysis notebooks recomputed everything from the raw feeds on every
+# run. ResultCache stores a function's output under a key derived from the
+# content of its input files, the function's version and its parameters, so
+# a result is recomputed only when one of those changes. map_sources applies
+# this per source: after a new CNN crawl only CNN's partition is recomputed.
+#
+#     from newscrawler.resultcache import ResultCache, cached
+#
+#     @cached(version=2, inputs=('path',))
+#     def entity_counts(path, min_count=5): ...
+#
+# DataFrames are stored as Parquet, NumPy arrays as .npy, anything else is
+# pickled. Files are evicted least-recently-used once the cache exceeds
+# max_bytes. Parameters must be JSON values, DataFrames/Series or arrays;
+# the latter are keyed by the hash of their content. Functions are keyed by
+# module and qualified name; lambdas, local functions and functions of a
+# script (__main__) add a hash of their code, since names do not tell them
+# apart, and closures are refused because their captured values are not.
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from newscrawler.corpus import SCHEMA_VERSION, Corpus, file_sha256
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+RESULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'cache', 'results')
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def function_id(func: Callable) -> str:
+    name = f'{func.__module__}.{func.__qualname__}'
+    if func.__module__ != '__main__' and '<' not in func.__qualname__:
+        return name
+    code = getattr(func, '__code__', None)
+    if code is None:
+        raise TypeError(f'Cannot cache {name!r}: not a Python function')
+    if code.co_freevars:
+        raise TypeError(f'Cannot cache {name!r}: it closes over {", ".join(code.co_freevars)}; '
+                        f'pass those values as parameters')
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = ''
+    digest = hashlib.sha256(
+        '\0'.join([source, code.co_code.hex(), repr(code.co_names), repr(code.co_varnames)]).encode('utf-8')
+    ).hexdigest()
+    return f'{name}@{digest[:16]}'
+
+
+def corpus_id(corpus: Corpus) -> str:
+    """Hash of the corpus settings and schema that shape what a feed reads as"""
+    settings = {
+        'schema': SCHEMA_VERSION,
+        'data_dir': os.path.abspath(corpus.data_dir),
+        'pattern': corpus.pattern,
+        'latest_only': corpus.latest_only,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _param_key(value):
+    """JSON stand-in for a parameter json cannot encode"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        rows = pd.util.hash_pandas_object(value, index=True).to_numpy()
+        shape = {'columns': [str(c) for c in value.columns], 'dtypes': [str(d) for d in value.dtypes]} \
+            if isinstance(value, pd.DataFrame) else {'name': str(value.name), 'dtype': str(value.dtype)}
+        return {type(value).__name__: hashlib.sha256(rows.tobytes()).hexdigest(), **shape}
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        data = np.ascontiguousarray(value).tobytes()
+        return {'ndarray': hashlib.sha256(data).hexdigest(), 'dtype': str(value.dtype),
+                'shape': list(value.shape)}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Cannot build a cache key from a {type(value).__name__} parameter; '
+                    f'pass JSON values, DataFrames or arrays')
+
+
+class ResultCache:
+    """Directory of results named by the sha256 of their cache key."""
+
+    def __init__(self, directory: str = RESULT_CACHE_DIR, max_bytes: int = 2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # running size of the stored results, counted on the first put
+        self._size: Optional[int] = None
+        os.makedirs(directory, exist_ok=True)
+        self._hash_memo_path = os.path.join(directory, 'input_hashes.json')
+        self._hash_memo = {}
+        if os.path.exists(self._hash_memo_path):
+            with open(self._hash_memo_path) as f:
+                self._hash_memo = json.load(f)
+
+    # ─── keys ────────────────────────────────────────────────────────────────
+    def input_hash(self, path: str) -> str:
+        """sha256 of an input file, only re-hashed when its size or mtime change"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        memo = self._hash_memo.get(path)
+        if memo and memo[:2] == stamp:
+            return memo[2]
+        digest = file_sha256(path)
+        self._hash_memo[path] = stamp + [digest]
+        with open(f'{self._hash_memo_path}.part', 'w') as f:
+            json.dump(self._hash_memo, f)
+        os.replace(f'{self._hash_memo_path}.part', self._hash_memo_path)
+        return digest
+
+    @staticmethod
+    def key(name: str, version, input_hashes: Sequence[str], params: Dict) -> str:
+        payload = json.dumps(
+            {'name': name, 'version': version, 'inputs': list(input_hashes), 'params': params},
+            sort_keys=True, default=_param_key
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ─── storage ─────────────────────────────────────────────────────────────
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}{ext}')
+
+    def _find(self, key: str) -> Optional[str]:
+        for ext in ('.parquet', '.npy', '.pkl'):
+            path = self._path(key, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, key: str, default=_MISSING):
+        path = self._find(key)
+        if path is None:
+            self.misses += 1
+            return default
+        # reads count as use for the LRU order
+        os.utime(path)
+        self.hits += 1
+        if path.endswith('.parquet'):
+            return pd.read_parquet(path)
+        if path.endswith('.npy'):
+            return np.load(path, allow_pickle=False)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def put(self, key: str, value):
+        if isinstance(value, pd.DataFrame):
+            path = self._path(key, '.parquet')
+        elif isinstance(value, np.ndarray) and value.dtype != object:
+            path = self._path(key, '.npy')
+        else:
+            path = self._path(key, '.pkl')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        if os.path.exists(path):
+            self._size -= os.path.getsize(path)
+
+        tmp_path = f'{path}.part'
+        if path.endswith('.parquet'):
+            value.to_parquet(tmp_path)
+        elif path.endswith('.npy'):
+            with open(tmp_path, 'wb') as f:
+                np.save(f, value, allow_pickle=False)
+        else:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.evict()
+        return value
+
+    def _entries(self):
+        """(mtime, size, path) of every stored result"""
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.endswith(('.parquet', '.npy', '.pkl')):
+                    path = os.path.join(dirpath, filename)
+                    st = os.stat(path)
+                    yield st.st_mtime, st.st_size, path
+
+    def evict(self):
+        """Drop least recently used results until the cache fits max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            logger.info(f"Evicted {path} from the result cache")
+        self._size = total
+
+    def compute(self, func: Callable, version, input_hashes: Sequence[str], params: Dict,
+                *args, **kwargs):
+        """Return the cached result for this key, calling func on a miss"""
+        key = self.key(function_id(func), version, input_hashes, params)
+        value = self.get(key)
+        if value is _MISSING:
+            value = self.put(key, func(*args, **kwargs))
+        return value
+
+
+def cached(version=1, inputs: Iterable[str] = (), cache: Optional[ResultCache] = None):
+    """Decorator caching a function on (input file hashes, version, parameters).
+
+    `inputs` names the arguments that are file paths (or lists of paths);
+    their content hashes replace them in the key, so moving or touching a
+    file does not invalidate its results but changing it does. Bump
+    `version` whenever the function's logic changes.
+    """
+    inputs = tuple(inputs)
+
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            store = cache or ResultCache()
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            hashes = []
+            for name in inputs:
+                paths = params.pop(name)
+                for path in ([paths] if isinstance(paths, str) else paths):
+                    hashes.append(store.input_hash(path))
+            return store.compute(func, version, hashes, params, *args, **kwargs)
+
+        wrapper.version = version
+        return wrapper
+
+    return decorate
+
+
+def map_sources(func: Callable, corpus: Optional[Corpus] = None,
+                sources: Optional[Iterable[str]] = None, version=1,
+                cache: Optional[ResultCache] = None, **params) -> pd.DataFrame:
+    """Run func(source, **params) for every source and concatenate the results.
+
+    Each source's result is cached against the hash of that source's feed
+    and of the corpus settings and schema version, so only sources whose
+    crawl changed are recomputed, and everything is after a change to how
+    the corpus is parsed. func must return a DataFrame.
+    """
+    corpus = corpus or Corpus()
+    cache = cache or ResultCache()
+    sources = sorted(corpus.refresh(sources))
+    settings = corpus_id(corpus)
+    parts = [
+        cache.compute(func, version, [corpus.feed_hash(source), settings], {'source': source, **params},
+                      source, **params)
+        for source in sources
+    ]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
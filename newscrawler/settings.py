@@ -67,7 +67,10 @@ RETRY_HTTP_CODES = [500, 502, 503, 504, 408, 429, 404]
 # Enable and configure item pipelines
 ITEM_PIPELINES = {
     'newscrawler.pipelines.NewscrawlerPipeline': 300,
-    'scrapy.pipelines.files.FilesPipeline': None
+    # Per-article metrics of the News Article Analysis notebook
+    'newscrawler.pipelines.TextFeaturesPipeline': 400,
+    # Only active when FILES_STORE is set (-s FILES_STORE=<dir>)
+    'newscrawler.pipelines.ArticleImagesPipeline': 200
 }
 
 # Allow URL revisiting
@@ -86,6 +89,7 @@ DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.httpauth.HttpAuthMiddleware': 300,
     'scrapy.downloadermiddlewares.downloadtimeout.DownloadTimeoutMiddleware': 350,
     'scrapy.downloadermiddlewares.defaultheaders.DefaultHeadersMiddleware': 400,
+    'newscrawler.middlewares.AmpDownloaderMiddleware': 450,
     'scrapy.downloadermiddlewares.useragent.UserAgentMiddleware': 500,
     'scrapy.downloadermiddlewares.retry.RetryMiddleware': 550,
     'scrapy.downloadermiddlewares.ajaxcrawl.AjaxCrawlMiddleware': 560,
@@ -97,6 +101,10 @@ DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware': 900,
 }
 
+# AMP/lite article fetching (spiders with an AMP_URL_RULE, run with -a amp=1)
+# Give up on the AMP rewrite after this many consecutive failed AMP fetches
+AMP_MAX_FAILURES = 20
+
 # Spider middlewares
 SPIDER_MIDDLEWARES = {
     'scrapy.spidermiddlewares.httperror.HttpErrorMiddleware': 50,
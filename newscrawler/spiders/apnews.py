@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.keywordstats import KeywordCounter
+
 class APNewsSpider(SitemapSpider):
     name = "ap_news_spider"
     allowed_domains = ['apnews.com']
@@ -67,26 +70,27 @@ class APNewsSpider(SitemapSpider):
 
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://apnews.com/ap-sitemap' 
-
         dates = {
             2023 : [10, 11, 12],
             2024 : [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
         }
 
-        for year, months in dates.items():
-            for month in months:
-                search_url = f'{base}-{year}{month:02d}.xml'
-                urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://apnews.com/ap-sitemap'
+        return [f'{base}-{day.year}{day.month:02d}.xml']
 
     def __init__(self, *args, **kwargs):
         super(APNewsSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='month',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -137,6 +141,7 @@ class APNewsSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                 }
                 yield article
 
@@ -161,6 +166,7 @@ class APNewsSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
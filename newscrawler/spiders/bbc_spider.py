@@ -1,10 +1,12 @@
 import scrapy
 from datetime import datetime
 import re
-from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.keywordstats import KeywordCounter
+from newscrawler.urlrules import UrlRules
+
 class BBCSpider(scrapy.Spider):
     name = "bbc_spider"
     allowed_domains = ['bbc.com', 'bbc.co.uk']
@@ -78,9 +80,19 @@ class BBCSpider(scrapy.Spider):
         'last_page':'.//button[not(@data-testid) and not(contains(text(), "..."))][last()]//text()'
     }
 
+    URL_RULES = {
+        'allow': ['/article/', '/live/', '/2023/', '/2024/'],
+        'deny': ['/video/', '/gallery/', '/audio/', '/pictures/', '/commentisfree/'],
+        'date_in_path': r'/(?P<year>\d{4})/(?P<month>[a-z]{3})/(?P<day>\d{1,2})/',
+        'date_range': ('2023-10-07', '2024-10-07'),
+        'ignore_case': ['deny'],
+    }
+
     def __init__(self, *args, **kwargs):
         super(BBCSpider, self).__init__(*args, **kwargs)
+        self.url_rules = UrlRules.from_config(self.URL_RULES)
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -170,46 +182,14 @@ class BBCSpider(scrapy.Spider):
                 'date_published': date,
                 'authors': authors,
                 'keywords': list(matches),
-                'matched_keywords': list(matches)
+                'matched_keywords': list(matches),
+                'keyword_stats': self.keyword_counter.stats(title=title, text=text)
             }
             yield article
 
     def is_relevant_url(self, url: str) -> bool:
         """Check if URL is relevant (within date range)"""
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-        
-        month_to_num = {
-            'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 
-            'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
-            'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
-        }
-        
-        date_str = re.search(r"/(\d{4})/([a-z]{3})/(\d{1,2})/", path)
-        date_relevant = False
-
-        if date_str:
-            year, month, day = date_str.groups()
-            year = int(year)
-            month = month_to_num[month.lower()]
-            day = int(day)
-
-            start_date = datetime(2023, 10, 7)
-            end_date = datetime(2024, 10, 7)
-
-            if start_date <= datetime(year, month, day) <= end_date:
-                date_relevant = True
-        
-        is_article = any(x in path for x in ['/article/', '/live/', '/2023/', '/2024/'])
-        
-        ignore_patterns = [
-            r'/video/', r'/gallery/', r'/audio/',
-            r'/pictures/', r'/commentisfree/'
-        ]
-        
-        should_ignore = any(re.search(pattern, path, re.IGNORECASE) for pattern in ignore_patterns)
-        
-        return is_article and not should_ignore and date_relevant
+        return self.url_rules.is_relevant(url)
 
     def _compile_keyword_patterns(self) -> Dict[str, list]:
         patterns = {}
@@ -239,4 +219,6 @@ class BBCSpider(scrapy.Spider):
         self.logger.info(f"Total pages crawled: {self.stats['pages_crawled']}")
         self.logger.info(f"Total articles found: {self.stats['articles_found']}")
         for keyword, count in self.stats['keyword_matches'].items():
-            self.logger.info(f"Keyword '{keyword}': {count} matches")
\ No newline at end of file
+            self.logger.info(f"Keyword '{keyword}': {count} matches")
+        for rule, count in self.url_rules.fired.most_common():
+            self.logger.info(f"URL rule '{rule}': {count} urls")
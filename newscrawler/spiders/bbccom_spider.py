@@ -6,6 +6,8 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.keywordstats import KeywordCounter
+
 class BBCNewsSpider(SitemapSpider):
     name = "bbc_news_spider"
     allowed_domains = ['bbc.com', 'bbc.co.uk']
@@ -46,6 +48,12 @@ class BBCNewsSpider(SitemapSpider):
         ('news', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://feeds.bbci.co.uk/news/world/middle_east/rss.xml',
+        'https://feeds.bbci.co.uk/news/world/rss.xml'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -86,6 +94,7 @@ class BBCNewsSpider(SitemapSpider):
         super(BBCNewsSpider, self).__init__(*args, **kwargs)
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -133,6 +142,7 @@ class BBCNewsSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                     'images': images,
                     'captions': captions
                 }
@@ -6,6 +6,9 @@ from typing import Dict, Set
 import os
 import random
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.keywordstats import KeywordCounter
+
 class CNBCSpider(scrapy.Spider):
     name = "cnbc_spider"
     allowed_domains = ['cnbc.com']
@@ -56,6 +59,11 @@ class CNBCSpider(scrapy.Spider):
         }
     }
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://www.cnbc.com/id/100727362/device/rss/rss.html'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -81,10 +89,6 @@ class CNBCSpider(scrapy.Spider):
     
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://www.cnbc.com/site-map/articles'
-
         dates = {
             2023 : {
                 'October' : [7, 31],
@@ -105,18 +109,21 @@ class CNBCSpider(scrapy.Spider):
             }
         }
 
-        for year, months in dates.items():
-            for month, (start, end) in months.items():
-                for day in range(start, end+1):
-                    
-                    search_url = f'{base}/{year}/{month}/{day}/'
-                    urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://www.cnbc.com/site-map/articles'
+        return [f'{base}/{day.year}/{day:%B}/{day.day}/']
 
     def __init__(self, *args, **kwargs):
         super(CNBCSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='day',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.start_urls = self.create_start_urls()
         self.visited_pages = set()  # Track visited pages
         self.stats = {
@@ -196,7 +203,8 @@ class CNBCSpider(scrapy.Spider):
                 'date_published': date,
                 'authors': authors,
                 'keywords': list(matches),
-                'matched_keywords': list(matches)
+                'matched_keywords': list(matches),
+                'keyword_stats': self.keyword_counter.stats(title=title, key_points=key_points, text=text)
             }
             yield article
 
@@ -221,6 +229,7 @@ class CNBCSpider(scrapy.Spider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
@@ -6,6 +6,10 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.jsonld import extract_news_article
+from newscrawler.keywordstats import KeywordCounter
+
 class CNNSpider(SitemapSpider):
     name = "cnn_spider"
     allowed_domains = ['cnn.com']
@@ -50,6 +54,13 @@ class CNNSpider(SitemapSpider):
         
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'http://rss.cnn.com/rss/edition_world.rss',
+        'http://rss.cnn.com/rss/edition_meast.rss',
+        'http://rss.cnn.com/rss/cnn_allpolitics.rss'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -90,28 +101,28 @@ class CNNSpider(SitemapSpider):
 
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        bases = ['https://edition.cnn.com/sitemap/article/world', 'https://edition.cnn.com/sitemap/article/politics', 'https://edition.cnn.com/sitemap/article/us']
-
         dates = {
             2023 : [10, 11, 12],
             2024 : [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12],
             2025 : [1, 2, 3, 4, 5]
         }
 
-        for year, months in dates.items():
-            for month in months:
-                for base in bases:
-                    search_url = f'{base}/{year}/{month:02d}.xml'
-                    urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        bases = ['https://edition.cnn.com/sitemap/article/world', 'https://edition.cnn.com/sitemap/article/politics', 'https://edition.cnn.com/sitemap/article/us']
+        return [f'{base}/{day.year}/{day.month:02d}.xml' for base in bases]
 
     def __init__(self, *args, **kwargs):
         super(CNNSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='month',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -154,10 +165,12 @@ class CNNSpider(SitemapSpider):
         if response.url not in self.visited_pages:
             self.visited_pages.add(response.url)
         
-            title = ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
-            text = ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
-            date = response.xpath(self.SITE_CONFIG['date_path']).get()
-            authors = response.xpath(self.SITE_CONFIG['author_path']).getall()
+            # JSON-LD first, SITE_CONFIG XPaths only for the fields it is missing
+            ld = extract_news_article(response)
+            title = ld.get('title') or ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
+            text = ld.get('text') or ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
+            date = ld.get('date_published') or response.xpath(self.SITE_CONFIG['date_path']).get()
+            authors = ld.get('authors') or response.xpath(self.SITE_CONFIG['author_path']).getall()
 
             images = []
             captions_cleaned = []
@@ -204,6 +217,7 @@ class CNNSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                     'images': images,
                     'captions': captions_cleaned
                 }
@@ -230,6 +244,7 @@ class CNNSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
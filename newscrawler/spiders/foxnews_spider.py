@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.jsonld import extract_news_article
+from newscrawler.keywordstats import KeywordCounter
+
 class FoxNewsSpider(SitemapSpider):
     name = "fox_news_spider"
     allowed_domains = ['foxnews.com']
@@ -46,6 +49,12 @@ class FoxNewsSpider(SitemapSpider):
         ('news', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://moxie.foxnews.com/google-publisher/world.xml',
+        'https://moxie.foxnews.com/google-publisher/politics.xml'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -87,6 +96,7 @@ class FoxNewsSpider(SitemapSpider):
         super(FoxNewsSpider, self).__init__(*args, **kwargs)
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -129,11 +139,13 @@ class FoxNewsSpider(SitemapSpider):
         if response.url not in self.visited_pages:
             self.visited_pages.add(response.url)
         
-            title = ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
-            description = ' '.join(response.xpath(self.SITE_CONFIG['description_path']).getall()).strip()
-            text = ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
-            date = response.xpath(self.SITE_CONFIG['date_path']).get()
-            authors = response.xpath(self.SITE_CONFIG['author_path']).getall()
+            # JSON-LD first, SITE_CONFIG XPaths only for the fields it is missing
+            ld = extract_news_article(response)
+            title = ld.get('title') or ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
+            description = ld.get('description') or ' '.join(response.xpath(self.SITE_CONFIG['description_path']).getall()).strip()
+            text = ld.get('text') or ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
+            date = ld.get('date_published') or response.xpath(self.SITE_CONFIG['date_path']).get()
+            authors = ld.get('authors') or response.xpath(self.SITE_CONFIG['author_path']).getall()
 
             if title:
                 self.logger.info(f"Found article with title: {title}")
@@ -160,6 +172,7 @@ class FoxNewsSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                 }
                 yield article
 
@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.keywordstats import KeywordCounter
+
 class IndependentUKSpider(SitemapSpider):
     name = "independent_uk_spider"
     allowed_domains = ['independent.co.uk']
@@ -46,6 +49,11 @@ class IndependentUKSpider(SitemapSpider):
         ('news', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://www.independent.co.uk/news/world/middle-east/rss'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -68,10 +76,6 @@ class IndependentUKSpider(SitemapSpider):
 
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://www.independent.co.uk/sitemaps/sitemap-articles' 
-
         dates = {
             2023 : {
                 10 : [7, 31],
@@ -92,18 +96,22 @@ class IndependentUKSpider(SitemapSpider):
             }
         }
 
-        for year, months in dates.items():
-            for month, (start, end) in months.items():
-                for day in range(start, end+1):
-                    search_url = f'{base}-{year}-{month:02d}-{day:02d}.xml'
-                    urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://www.independent.co.uk/sitemaps/sitemap-articles'
+        return [f'{base}-{day.year}-{day.month:02d}-{day.day:02d}.xml']
 
     def __init__(self, *args, **kwargs):
         super(IndependentUKSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='day',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -177,6 +185,7 @@ class IndependentUKSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                 }
                 yield article
 
@@ -201,6 +210,7 @@ class IndependentUKSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.keywordstats import KeywordCounter
+
 class IndiaSpider(SitemapSpider):
     name = "india_spider"
     allowed_domains = ['india.com']
@@ -46,6 +49,11 @@ class IndiaSpider(SitemapSpider):
         ('/news/', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://www.india.com/feed/'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -71,27 +79,29 @@ class IndiaSpider(SitemapSpider):
 
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://www.india.com/sitemap' 
-
         dates = {
             2023 : ['october', 'november', 'december'],
             2024 : ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october','november', 'december'],
             2025 : ['january', 'february', 'march', 'april', 'may']
         }
 
-        for year, months in dates.items():
-            for month in months:
-                search_url = f'{base}-{month}-{year}.xml'
-                urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://www.india.com/sitemap'
+        month = day.strftime('%B').lower()
+        return [f'{base}-{month}-{day.year}.xml']
 
     def __init__(self, *args, **kwargs):
         super(IndiaSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='month',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -143,6 +153,7 @@ class IndiaSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                     'images': images,
                     'captions': captions
                 }
@@ -169,6 +180,7 @@ class IndiaSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
@@ -0,0 +1,222 @@
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+from scrapy.selector import Selector
+from scrapy.spiderloader import SpiderLoader
+from twisted.internet import task
+from datetime import datetime
+import time
+import os
+
+from newscrawler.polling import BoundedSet, FeedState
+
+class NewsMonitorSpider(scrapy.Spider):
+    """Long-running monitor over the outlets' RSS and news-sitemap feeds.
+
+    Polls the FEED_URLS declared by each outlet spider on an adaptive
+    interval and hands every unseen article to that outlet's own
+    parse_article, so keyword matching and field extraction are exactly
+    those of the batch crawls.
+
+    scrapy crawl news_monitor -a outlets=cnn_spider,nbc_news_spider
+    scrapy crawl news_monitor -a outlets=cnn_spider -a feeds=http://127.0.0.1:8000/rss.xml
+    scrapy crawl news_monitor -a feeds=cnn_spider=http://127.0.0.1:8000/cnn.xml,bbc_spider=http://127.0.0.1:8000/bbc.xml
+
+    Plain feed urls replace the FEED_URLS of a single selected outlet;
+    outlet=url pairs assign each feed to its outlet.
+    """
+    name = "news_monitor"
+
+    date = datetime.now().strftime("%Y%m%d")
+
+    # Set up directory paths
+    PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+    LOG_DIR = os.path.join(PROJECT_ROOT, 'logs')
+
+    # Create directories if they don't exist
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    custom_settings = {
+        'ROBOTSTXT_OBEY': True,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 2,
+        'DOWNLOAD_DELAY': 3,
+        'COOKIES_ENABLED': False,
+        'HTTPCACHE_ENABLED': False,
+        'REDIRECT_ENABLED': True,
+        'LOG_LEVEL': 'INFO',
+        'LOG_FILE': os.path.join(LOG_DIR, f'news_monitor_{date}.log'),
+        'LOG_FORMAT': '%(asctime)s [%(name)s] %(levelname)s: %(message)s',
+        'FEEDS': {
+            # jsonlines so items are usable while the monitor keeps running
+            os.path.join(DATA_DIR, f'monitor_articles_{date}.jsonl'): {
+                'format': 'jsonlines',
+                'encoding': 'utf8',
+                'store_empty': False
+            }
+        }
+    }
+
+    FEED_LINK_XPATH = '//item/link/text() | //entry/link/@href | //url/loc/text()'
+
+    # How often to check which feeds are due, in seconds
+    TICK = 5
+
+    def __init__(self, outlets=None, feeds=None, min_interval=60, max_interval=900,
+                 max_seen=50000, *args, **kwargs):
+        super(NewsMonitorSpider, self).__init__(*args, **kwargs)
+        self.outlet_names = [o.strip() for o in outlets.split(',')] if outlets else None
+        self.feed_override = self._parse_feeds(feeds) if feeds else None
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.max_seen = int(max_seen)
+
+        self.outlets = {}
+        self.feeds = {}
+        self.seen = BoundedSet(self.max_seen)
+        self.stats = {
+            'feed_polls': 0,
+            'feed_errors': 0,
+            'articles_queued': 0,
+            'start_time': datetime.now()
+        }
+
+    @staticmethod
+    def _parse_feeds(feeds):
+        """'url,...' -> {None: [url, ...]}; 'outlet=url,...' -> {outlet: [url, ...]}"""
+        override = {}
+        for entry in filter(None, (f.strip() for f in feeds.split(','))):
+            outlet, sep, url = entry.partition('=')
+            # a '=' inside a url query is not an outlet name
+            if not sep or '/' in outlet:
+                outlet, url = None, entry
+            override.setdefault(outlet, []).append(url.strip())
+        if None in override and len(override) > 1:
+            raise ValueError("feeds= takes either plain urls or outlet=url pairs, not both")
+        return override
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(NewsMonitorSpider, cls).from_crawler(crawler, *args, **kwargs)
+        spider.setup_outlets(SpiderLoader.from_settings(crawler.settings))
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        return spider
+
+    def setup_outlets(self, loader):
+        """Instantiate the outlet spiders whose parse_article we reuse"""
+        override = self.feed_override or {}
+        names = self.outlet_names or [name for name in override if name is not None] or [
+            name for name in loader.list()
+            if getattr(loader.load(name), 'FEED_URLS', None)
+        ]
+        if None in override and len(names) != 1:
+            raise ValueError(
+                f"feeds= with plain urls needs exactly one outlet, got {len(names)}; "
+                f"pass outlet=url pairs instead"
+            )
+        unknown = set(override) - set(names) - {None}
+        if unknown:
+            raise ValueError(f"feeds= names outlets that are not selected: {', '.join(sorted(unknown))}")
+
+        for name in names:
+            outlet = loader.load(name).from_crawler(self.crawler)
+            feed_urls = override.get(name) or override.get(None) or getattr(outlet, 'FEED_URLS', [])
+            if not feed_urls:
+                self.logger.warning(f"Outlet {name} has no FEED_URLS, skipping")
+                continue
+
+            # Outlet state must stay bounded over weeks of uptime
+            outlet.visited_pages = BoundedSet(self.max_seen)
+            self.outlets[name] = outlet
+            for url in feed_urls:
+                self.feeds[url] = FeedState(url, name, self.min_interval, self.max_interval)
+
+        self.logger.info(f"Monitoring {len(self.feeds)} feeds for {len(self.outlets)} outlets")
+
+    def start_requests(self):
+        return self.due_requests()
+
+    def spider_opened(self, spider):
+        self.ticker = task.LoopingCall(self.schedule_due)
+        self.ticker.start(self.TICK, now=False)
+
+    def spider_idle(self, spider):
+        self.schedule_due()
+        raise DontCloseSpider
+
+    def schedule_due(self):
+        for request in self.due_requests():
+            self.crawler.engine.crawl(request)
+
+    def due_requests(self):
+        now = time.time()
+        for state in self.feeds.values():
+            if state.is_due(now):
+                state.started()
+                self.stats['feed_polls'] += 1
+                yield scrapy.Request(
+                    state.url,
+                    callback=self.parse_feed,
+                    errback=self.feed_failed,
+                    cb_kwargs={'state': state},
+                    dont_filter=True,
+                    meta={'dont_cache': True}
+                )
+
+    def parse_feed(self, response, state):
+        """Queue the articles in a feed that have not been seen before"""
+        if not hasattr(response, 'text'):
+            state.failed()
+            self.logger.warning(f"Feed {state.url} did not return a text response")
+            return
+
+        selector = Selector(text=response.text, type='xml')
+        selector.remove_namespaces()
+        links = [link.strip() for link in selector.xpath(self.FEED_LINK_XPATH).getall()]
+
+        # Feeds are already section feeds; the outlet's parse_article does
+        # the keyword filtering, so every unseen link is fetched
+        new_links = []
+        for url in links:
+            if url and url not in self.seen:
+                self.seen.add(url)
+                new_links.append(url)
+
+        state.finished(len(new_links))
+        self.logger.info(
+            f"Feed {state.url}: {len(links)} links, {len(new_links)} new, "
+            f"next poll in {state.interval:.0f}s"
+        )
+
+        for url in new_links:
+            self.stats['articles_queued'] += 1
+            yield scrapy.Request(
+                url,
+                callback=self.parse_article,
+                cb_kwargs={'outlet': state.outlet}
+            )
+
+    def feed_failed(self, failure):
+        state = failure.request.cb_kwargs['state']
+        state.failed()
+        self.stats['feed_errors'] += 1
+        self.logger.warning(f"Feed {state.url} failed: {failure.value!r}, retrying in {state.interval:.0f}s")
+
+    def parse_article(self, response, outlet):
+        """Delegate to the outlet spider's own article parser"""
+        yield from self.outlets[outlet].parse_article(response)
+
+    def closed(self, reason):
+        if getattr(self, 'ticker', None) and self.ticker.running:
+            self.ticker.stop()
+        elapsed_time = datetime.now() - self.stats['start_time']
+        self.logger.info("Spider closed. Final statistics:")
+        self.logger.info(f"Reason for closing: {reason}")
+        self.logger.info(f"Total run time: {elapsed_time}")
+        self.logger.info(f"Total feed polls: {self.stats['feed_polls']}")
+        self.logger.info(f"Total feed errors: {self.stats['feed_errors']}")
+        self.logger.info(f"Total articles queued: {self.stats['articles_queued']}")
+        for name, outlet in self.outlets.items():
+            self.logger.info(f"{name}: {outlet.stats['articles_found']} matching articles")
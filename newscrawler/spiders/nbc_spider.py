@@ -6,6 +6,10 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.jsonld import extract_news_article
+from newscrawler.keywordstats import KeywordCounter
+
 class NBCNewsSpider(SitemapSpider):
     name = "nbc_news_spider"
     allowed_domains = ['nbcnews.com']
@@ -46,6 +50,12 @@ class NBCNewsSpider(SitemapSpider):
         ('news', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://feeds.nbcnews.com/nbcnews/public/world',
+        'https://feeds.nbcnews.com/nbcnews/public/politics'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -79,10 +89,6 @@ class NBCNewsSpider(SitemapSpider):
 
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://www.nbcnews.com/sitemap/nbcnews/sitemap' 
-
         dates = {
             2023 : [10, 11, 12],
             2024 : [1, 2, 3, 4, 5, 6, 7, 8, 9, 10,11,12],
@@ -90,17 +96,22 @@ class NBCNewsSpider(SitemapSpider):
 
         }
 
-        for year, months in dates.items():
-            for month in months:
-                search_url = f'{base}-{year}-{month:02d}-article.xml'
-                urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://www.nbcnews.com/sitemap/nbcnews/sitemap'
+        return [f'{base}-{day.year}-{day.month:02d}-article.xml']
 
     def __init__(self, *args, **kwargs):
         super(NBCNewsSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='month',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -143,11 +154,13 @@ class NBCNewsSpider(SitemapSpider):
         if response.url not in self.visited_pages:
             self.visited_pages.add(response.url)
         
-            title = ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
-            description = ' '.join(response.xpath(self.SITE_CONFIG['description_path']).getall()).strip()
-            text = ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
-            date = response.xpath(self.SITE_CONFIG['date_path']).get()
-            authors = response.xpath(self.SITE_CONFIG['author_path']).getall()
+            # JSON-LD first, SITE_CONFIG XPaths only for the fields it is missing
+            ld = extract_news_article(response)
+            title = ld.get('title') or ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
+            description = ld.get('description') or ' '.join(response.xpath(self.SITE_CONFIG['description_path']).getall()).strip()
+            text = ld.get('text') or ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
+            date = ld.get('date_published') or response.xpath(self.SITE_CONFIG['date_path']).get()
+            authors = ld.get('authors') or response.xpath(self.SITE_CONFIG['author_path']).getall()
             images = response.xpath(self.SITE_CONFIG['image_path']).getall()
             caption_parts = response.xpath('//figcaption[contains(@class, "caption")]//text()').getall()
             captions = ' '.join([part.strip() for part in caption_parts if part.strip()])
@@ -178,6 +191,7 @@ class NBCNewsSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                     'images': images,
                     'captions': captions
                 }
@@ -204,6 +218,7 @@ class NBCNewsSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
@@ -6,6 +6,8 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.keywordstats import KeywordCounter
+
 class NewsweekSpider(SitemapSpider):
     name = "newsweek_spider"
     allowed_domains = ['newsweek.com']
@@ -103,6 +105,7 @@ class NewsweekSpider(SitemapSpider):
         super(NewsweekSpider, self).__init__(*args, **kwargs)
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -177,6 +180,7 @@ class NewsweekSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                     'images': images,
                     'captions': captions_cleaned
                 }
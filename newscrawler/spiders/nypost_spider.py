@@ -6,6 +6,10 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.jsonld import extract_news_article
+from newscrawler.keywordstats import KeywordCounter
+
 class NYPostSpider(SitemapSpider):
     name = "nypost_spider"
     allowed_domains = ['nypost.com']
@@ -46,6 +50,11 @@ class NYPostSpider(SitemapSpider):
         ('news/', 'parse_article')
     ]
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://nypost.com/news/feed/'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -88,12 +97,24 @@ class NYPostSpider(SitemapSpider):
         'caption_xpath':    './/figcaption/text()'
     }
 
-    def create_start_urls(self):
-        # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
+    # Lightweight article variant, fetched instead of the full page with -a amp=1.
+    # Overrides SITE_CONFIG for AMP responses; JSON-LD covers most text fields.
+    AMP_URL_RULE = (r'^(https://nypost\.com/\d{4}/\d{2}/\d{2}/[^?#]*[^/?#])(?<!/amp)/?$', r'\1/amp/')
 
-        base = 'https://nypost.com/sitemap'
+    AMP_SITE_CONFIG = {
+        'title_path': '//h1//text()',
+        'text_path': '//div[contains(@class, "entry-content")]//p//text()',
+        'image_main_container': (
+            '//figure['
+            '  .//amp-img'
+            '  and not(ancestor::*[contains(@class,"related-posts") or contains(@class,"widget")])'
+            ']'
+        ),
+        'image_src_xpath':  './/amp-img/@src',
+    }
 
+    def create_start_urls(self):
+        # Generate sitemap urls for 7th October 2023 - 7th October 2024
         dates = {
             2023 : {
                 10 : [7, 31],
@@ -130,18 +151,22 @@ class NYPostSpider(SitemapSpider):
             }
         }
 
-        for year, months in dates.items():
-            for month, (start, end) in months.items():
-                for day in range(start, end+1):
-                    search_url = f'{base}-{year}.xml?mm={month:02d}&dd={day:02d}'
-                    urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://nypost.com/sitemap'
+        return [f'{base}-{day.year}.xml?mm={day.month:02d}&dd={day.day:02d}']
 
     def __init__(self, *args, **kwargs):
         super(NYPostSpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='day',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -155,13 +180,26 @@ class NYPostSpider(SitemapSpider):
         self.stats['pages_crawled'] += 1
         self.logger.info(f"Parsing article: {response.url}")
 
-        if response.url not in self.visited_pages:
-            self.visited_pages.add(response.url)
+        url = response.meta.get('amp_original_url', response.url)
+        if url not in self.visited_pages:
+            self.visited_pages.add(url)
+
+            config = self.SITE_CONFIG
+            if url != response.url:
+                config = {**self.SITE_CONFIG, **self.AMP_SITE_CONFIG}
         
-            title = ' '.join(response.xpath(self.SITE_CONFIG['title_path']).getall()).strip()
-            text = ' '.join(response.xpath(self.SITE_CONFIG['text_path']).getall()).strip()
-            date = response.xpath(self.SITE_CONFIG['date_path']).get()
-            authors = response.xpath(self.SITE_CONFIG['author_path']).getall()
+            # JSON-LD first, SITE_CONFIG XPaths only for the fields it is missing
+            ld = extract_news_article(response)
+            title = ld.get('title') or ' '.join(response.xpath(config['title_path']).getall()).strip()
+            text = ld.get('text') or ' '.join(response.xpath(config['text_path']).getall()).strip()
+            date = ld.get('date_published') or response.xpath(config['date_path']).get()
+            authors = ld.get('authors') or response.xpath(config['author_path']).getall()
+
+            if url != response.url and not text:
+                # AMP variant came back without a body, fetch the full page instead
+                self.visited_pages.discard(url)
+                yield scrapy.Request(url, callback=self.parse_article, meta={'amp_skip': True}, dont_filter=True)
+                return
 
             # Extract images + captions
             images = []
@@ -173,10 +211,10 @@ class NYPostSpider(SitemapSpider):
                     return False
                 return url.lower().split('?')[0].endswith('.jpg')
 
-            image_blocks = response.xpath(self.SITE_CONFIG['image_main_container'])
+            image_blocks = response.xpath(config['image_main_container'])
             for block in image_blocks:
-                img_url = block.xpath(self.SITE_CONFIG['image_src_xpath']).get()
-                raw_cap = block.xpath(self.SITE_CONFIG['caption_xpath']).get()
+                img_url = block.xpath(config['image_src_xpath']).get()
+                raw_cap = block.xpath(config['caption_xpath']).get()
 
                 if is_valid_image(img_url) and img_url not in seen:
                     seen.add(img_url)
@@ -202,12 +240,13 @@ class NYPostSpider(SitemapSpider):
                 article = {
                     'title': title,
                     'text': text,
-                    'url': response.url,
+                    'url': url,
                     'source_domain': 'nypost.com',
                     'date_published': date,
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                     'images': images,
                     'captions': captions_cleaned
                 }
@@ -234,6 +273,7 @@ class NYPostSpider(SitemapSpider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
@@ -5,6 +5,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.checkpoint import SitemapCheckpoint
+from newscrawler.keywordstats import KeywordCounter
+
 class USATodaySpider(scrapy.Spider):
     name = "usatoday_spider"
     allowed_domains = ['usatoday.com']
@@ -42,6 +45,11 @@ class USATodaySpider(scrapy.Spider):
         }
     }
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'http://rssfeeds.usatoday.com/UsatodaycomWorld-TopStories'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -69,10 +77,6 @@ class USATodaySpider(scrapy.Spider):
     
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
-        urls = []
-
-        base = 'https://www.usatoday.com/sitemap'
-
         dates = {
             2023 : {
                 'october' : [7, 10],
@@ -102,17 +106,22 @@ class USATodaySpider(scrapy.Spider):
             }
         }
 
-        for year, months in dates.items():
-            for month, (start, end) in months.items():
-                for day in range(start, end+1):
-                    search_url = f'{base}/{year}/{month}/{day}/'
-                    urls.append(search_url)
+        return self.checkpoint.start_urls(dates, self.sitemap_urls_for)
 
-        return urls
+    def sitemap_urls_for(self, day):
+        base = 'https://www.usatoday.com/sitemap'
+        month = day.strftime('%B').lower()
+        return [f'{base}/{day.year}/{month}/{day.day}/']
 
     def __init__(self, *args, **kwargs):
         super(USATodaySpider, self).__init__(*args, **kwargs)
+        self.checkpoint = SitemapCheckpoint(
+            self.name, step='day',
+            mode=kwargs.get('mode', 'full'),
+            overlap=kwargs.get('overlap', 1)
+        )
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.start_urls = self.create_start_urls()
         self.visited_pages = set()  # Track visited pages
         self.stats = {
@@ -185,6 +194,7 @@ class USATodaySpider(scrapy.Spider):
                 'authors': authors,
                 'keywords': list(matches),
                 'matched_keywords': list(matches),
+                'keyword_stats': self.keyword_counter.stats(title=title, text=text),
                 'images': images,
                 'captions': captions_cleaned
             }
@@ -211,6 +221,7 @@ class USATodaySpider(scrapy.Spider):
         return matches
 
     def closed(self, reason):
+        self.checkpoint.commit(reason)
         elapsed_time = datetime.now() - self.stats['start_time']
         self.logger.info("Spider closed. Final statistics:")
         self.logger.info(f"Reason for closing: {reason}")
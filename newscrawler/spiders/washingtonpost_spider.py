@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.keywordstats import KeywordCounter
+from newscrawler.urlrules import UrlRules
+
 class WashingtonPostSpider(scrapy.Spider):
     name = "washington_post_spider"
     allowed_domains = ['washingtonpost.com']
@@ -44,6 +47,11 @@ class WashingtonPostSpider(scrapy.Spider):
         }
     }
 
+    # RSS / news-sitemap feeds polled by the news_monitor spider
+    FEED_URLS = [
+        'https://feeds.washingtonpost.com/rss/world'
+    ]
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -80,6 +88,13 @@ class WashingtonPostSpider(scrapy.Spider):
         ('military','parse_article')
     ]
 
+    # Sections to follow from the sitemaps, matched against the full url
+    URL_RULES = {
+        'allow': [pattern for pattern, _ in sitemap_rules],
+        'target': 'url',
+        'ignore_case': False
+    }
+
     def create_start_urls(self):
         # Generate sitemap urls for 7th October 2023 - 7th October 2024
         urls = []
@@ -102,8 +117,10 @@ class WashingtonPostSpider(scrapy.Spider):
 
     def __init__(self, *args, **kwargs):
         super(WashingtonPostSpider, self).__init__(*args, **kwargs)
+        self.url_rules = UrlRules.from_config(self.URL_RULES)
         self.start_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -126,10 +143,8 @@ class WashingtonPostSpider(scrapy.Spider):
         self.logger.info(f"Parsing sitemap: {response.url}")
         article_urls = response.xpath('//url/loc/text()').getall()
         for article_url in article_urls:
-            for keyword, callback in self.sitemap_rules:
-                if keyword in article_url:
-                    yield scrapy.Request(url=article_url, callback=getattr(self, callback))
-                    break
+            if self.url_rules.is_relevant(article_url):
+                yield scrapy.Request(url=article_url, callback=self.parse_article)
         
     def parse_article(self, response):
         """Parse individual article pages"""
@@ -170,6 +185,7 @@ class WashingtonPostSpider(scrapy.Spider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                 }
                 yield article
 
@@ -201,4 +217,6 @@ class WashingtonPostSpider(scrapy.Spider):
         self.logger.info(f"Total pages crawled: {self.stats['pages_crawled']}")
         self.logger.info(f"Total articles found: {self.stats['articles_found']}")
         for keyword, count in self.stats['keyword_matches'].items():
-            self.logger.info(f"Keyword '{keyword}': {count} matches")
\ No newline at end of file
+            self.logger.info(f"Keyword '{keyword}': {count} matches")
+        for rule, count in self.url_rules.fired.most_common():
+            self.logger.info(f"URL rule '{rule}': {count} urls")
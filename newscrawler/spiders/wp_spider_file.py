@@ -6,6 +6,9 @@ from urllib.parse import urlparse
 from typing import Dict, Set
 import os
 
+from newscrawler.keywordstats import KeywordCounter
+from newscrawler.urlrules import UrlRules
+
 class WPSpider(SitemapSpider):
     name = "wp_spider"
     allowed_domains = ['washingtonpost.com']
@@ -71,6 +74,13 @@ class WPSpider(SitemapSpider):
         ('military','parse_article')
     ]
 
+    # Sections to follow from the sitemaps, matched against the full url
+    URL_RULES = {
+        'allow': [pattern for pattern, _ in sitemap_rules],
+        'target': 'url',
+        'ignore_case': False
+    }
+
     KEYWORDS = {
         'primary': [
             'palestine', 'palestinian', 'palestinians', 
@@ -113,27 +123,11 @@ class WPSpider(SitemapSpider):
         return urls
 
     def __init__(self, *args, **kwargs):
-        self.sitemap_rules = [
-            (re.compile(pat), callback) 
-            for pat, callback in [
-                ('politics', 'parse_article'), 
-                ('national', 'parse_article'),
-                ('donald-trump', 'parse_article'),
-                ('israel-hamas-war', 'parse_article'),
-                ('world', 'parse_article'),
-                ('world-feed', 'parse_article'),
-                ('elon-musk', 'parse_article'),
-                ('us-policy', 'parse_article'),
-                ('kamala-harris', 'parse_article'),
-                ('national-security', 'parse_article'),
-                ('foreign-policy', 'parse_article'),
-                ('religion', 'parse_article'),
-                ('military', 'parse_article')
-            ]
-        ]
         super(WPSpider, self).__init__(*args, **kwargs)
+        self.url_rules = UrlRules.from_config(self.URL_RULES)
         self.sitemap_urls = self.create_start_urls()
         self.keyword_patterns = self._compile_keyword_patterns()
+        self.keyword_counter = KeywordCounter(self.KEYWORDS)
         self.visited_pages = set()  # Track visited pages
         self.stats = {
             'pages_crawled': 0,
@@ -184,7 +178,7 @@ class WPSpider(SitemapSpider):
                                 namespaces={'xmlns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}).getall()
             
             for url in urls:
-                if any(pat.search(url) for pat, _ in self.sitemap_rules):
+                if self.url_rules.is_relevant(url):
                     yield scrapy.Request(
                         url=url, 
                         callback=self.parse_article,
@@ -232,6 +226,7 @@ class WPSpider(SitemapSpider):
                     'authors': authors,
                     'keywords': list(matches),
                     'matched_keywords': list(matches),
+                    'keyword_stats': self.keyword_counter.stats(title=title, description=description, text=text),
                 }
                 yield article
 
@@ -264,4 +259,6 @@ class WPSpider(SitemapSpider):
         self.logger.info(f"Total pages crawled: {self.stats['pages_crawled']}")
         self.logger.info(f"Total articles found: {self.stats['articles_found']}")
         for keyword, count in self.stats['keyword_matches'].items():
-            self.logger.info(f"Keyword '{keyword}': {count} matches")
\ No newline at end of file
+            self.logger.info(f"Keyword '{keyword}': {count} matches")
+        for rule, count in self.url_rules.fired.most_common():
+            self.logger.info(f"URL rule '{rule}': {count} urls")
@@ -0,0 +1,122 @@
+# Per-article text features used by the "News Article Analysis" notebook
+#
+# The notebook used to re-read every feed and run one re.findall per metric.
+# text_features answers the word counts and every lexicon from a single
+# lowercase tokenisation of the article; only quotes, links and "was Xed"
+# need the raw text and get a scan each (the last one only when the article
+# contains "was"). The numbers can be stored with the item at crawl time and
+# the corpus tables become a groupby over these columns.
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+WORD = re.compile(r'\w+')
+QUOTE_OPEN = re.compile(r'[“"]')
+PASSIVE = re.compile(r'\bwas\s+(?=(\w+))', re.IGNORECASE)
+
+# Word-list metrics: column -> terms, matched case-insensitively on whole
+# tokens like the notebook's \b...\b regexes
+DEFAULT_LEXICONS = {
+    'modal_count': ['should', 'must', 'ought'],
+    'killed': ['killed'],
+    'died': ['died'],
+    'mentions_Israel': ['israel'],
+    'mentions_Palestine': ['palestine'],
+}
+
+
+def count_quotes(text: str) -> int:
+    """Number of “...” or "..." spans, as re.findall(r'“[^”]+”|\"[^\"]+\"')"""
+    count = 0
+    pos = 0
+    while True:
+        match = QUOTE_OPEN.search(text, pos)
+        if match is None:
+            return count
+        close = '”' if match.group() == '“' else '"'
+        end = text.find(close, match.end())
+        if end > match.end():
+            count += 1
+            pos = end + 1
+        else:
+            pos = match.end()
+
+
+def count_links(text: str) -> int:
+    """Number of http:// or https:// occurrences"""
+    count = 0
+    pos = text.find('://')
+    while pos != -1:
+        if text.endswith('http', 0, pos) or text.endswith('https', 0, pos):
+            count += 1
+        pos = text.find('://', pos + 3)
+    return count
+
+
+class FeatureExtractor:
+    """Computes the article metrics, the word-based ones from a single tokenisation.
+
+    Every lexicon is answered from the same token Counter (single words) or
+    from n-gram Counters built once per phrase length in use, so adding a
+    lexicon adds dictionary lookups rather than another scan of the text.
+    Multi-word terms match consecutive tokens.
+    """
+
+    def __init__(self, lexicons: Optional[Dict[str, List[str]]] = None):
+        self.lexicons = dict(DEFAULT_LEXICONS if lexicons is None else lexicons)
+        self.terms = {
+            column: [tuple(WORD.findall(term.lower())) for term in terms]
+            for column, terms in self.lexicons.items()
+        }
+        self.phrase_lengths = sorted({len(t) for terms in self.terms.values()
+                                      for t in terms if len(t) > 1})
+
+    def compute(self, title: str, body, n_images: int = 0) -> Dict[str, int]:
+        """All metrics for one article; text is f"{title} {body}" as in the notebook"""
+        title = (title or '').strip()
+        if isinstance(body, list):
+            body = ' '.join(body)
+        text = f"{title} {body or ''}"
+
+        tokens = WORD.findall(text.lower())
+        counts = Counter(tokens)
+        ngrams = {n: Counter(zip(*(tokens[i:] for i in range(n))))
+                  for n in self.phrase_lengths}
+
+        # "was Xed" needs the whitespace between tokens, so it is only scanned
+        # for when the article contains "was" at all
+        passive = 0
+        if counts['was']:
+            for match in PASSIVE.finditer(text):
+                word = match.group(1)
+                if len(word) > 2 and word[-2:].lower() == 'ed':
+                    passive += 1
+
+        features = {
+            'n_words': len(tokens),
+            'n_images': n_images,
+            'headline_len': len(WORD.findall(title)),
+            'vocab_size': len(counts),
+            'quote_count': count_quotes(text),
+            'passive_count': passive,
+            'external_links': count_links(text),
+        }
+        for column, terms in self.terms.items():
+            features[column] = sum(
+                counts[t[0]] if len(t) == 1 else ngrams[len(t)][t]
+                for t in terms if t
+            )
+        return features
+
+
+DEFAULT_EXTRACTOR = FeatureExtractor()
+
+
+def text_features(title: str, body, n_images: int = 0) -> Dict[str, int]:
+    """All per-article metrics of the News Article Analysis notebook.
+
+    The text is f"{title} {body}" as in the notebook; body may be a string
+    or a list of paragraphs. Column names match the notebook's DataFrames.
+    """
+    return DEFAULT_EXTRACTOR.compute(title, body, n_images)
@@ -0,0 +1,267 @@
+# Topic modelling over one shared document-term matrix
+#
+# Co_entity_analysis fitted CountVectorizer + LatentDirichletAllocation on
+# the USA Today file, then re-vectorised the May 2025 articles to fit a
+# second model (lda_may). DocumentTermMatrix vectorises the corpus once into
+# a sparse matrix with a fixed vocabulary, kept under cache/topics; months
+# and sources are row slices of it, and models are trained with online LDA
+# (partial_fit) over shuffled mini-batches of rows.
+#
+#     from newscrawler.topics import DocumentTermMatrix, fit_lda, top_words, topic_drift
+#     dtm = DocumentTermMatrix.load_or_build()
+#     lda = fit_lda(dtm, n_components=10, source='usatoday')
+#     top_words(lda, dtm.vocabulary)
+#     topic_drift(dtm, lda, source='usatoday')    # month x topic proportions
+#
+# A source whose feed changes is re-vectorised against the existing
+# vocabulary on the next load_or_build; rebuild() starts a new vocabulary.
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer
+
+from newscrawler.corpus import Corpus, month_of
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+TOPIC_DIR = os.path.join(PROJECT_ROOT, 'cache', 'topics')
+
+# Vectoriser settings of Co_entity_analysis
+VECTORIZER_PARAMS = {'max_df': 0.9, 'min_df': 2, 'stop_words': 'english'}
+
+logger = logging.getLogger(__name__)
+
+
+def _source_texts(corpus: Corpus, source: str) -> pd.DataFrame:
+    frame = corpus.frame([source], ['source', 'article_idx', 'date', 'text'])
+    frame['text'] = frame['text'].fillna('')
+    frame['source'] = frame['source'].astype(str)
+    frame['month'] = month_of(frame.pop('date'))
+    return frame
+
+
+def _vectorize(texts: pd.Series, vocabulary: Optional[Dict[str, int]] = None,
+               stop_words='english'):
+    """Counts of one source; its own vocabulary unless one is given"""
+    vectorizer = CountVectorizer(stop_words=stop_words, vocabulary=vocabulary)
+    matrix = vectorizer.fit_transform(texts).tocsr().astype(np.int32)
+    return matrix, vectorizer.get_feature_names_out()
+
+
+class DocumentTermMatrix:
+    """Articles x terms counts of the whole corpus, with source and month per row."""
+
+    def __init__(self, matrix: sp.csr_matrix, vocabulary: List[str], rows: pd.DataFrame,
+                 feeds: Dict[str, str], params: Dict):
+        self.matrix = matrix
+        self.vocabulary = list(vocabulary)
+        self.rows = rows.reset_index(drop=True)
+        self.feeds = feeds
+        self.params = params
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    # ─── building ────────────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, corpus: Optional[Corpus] = None, sources: Optional[Iterable[str]] = None,
+              max_df: Union[int, float] = 0.9, min_df: Union[int, float] = 2,
+              stop_words='english') -> 'DocumentTermMatrix':
+        """Vectorise every (selected) source once and fix the vocabulary.
+
+        Each source is tokenised a single time with its own vocabulary; the
+        corpus-wide document frequencies decide which terms survive
+        min_df/max_df, and the per-source columns are remapped onto them.
+        As in CountVectorizer, a float min_df/max_df is a proportion of the
+        articles and an int an absolute count.
+        """
+        corpus = corpus or Corpus()
+        sources = sorted(corpus.refresh(sources))
+        parts, rows, feeds = [], [], {}
+        doc_freq: Dict[str, int] = {}
+        for source in sources:
+            frame = _source_texts(corpus, source)
+            matrix, terms = _vectorize(frame['text'], stop_words=stop_words)
+            df = np.diff(matrix.tocsc().indptr)
+            for term, count in zip(terms, df):
+                doc_freq[term] = doc_freq.get(term, 0) + int(count)
+            parts.append((matrix, terms))
+            rows.append(frame[['source', 'article_idx', 'month']])
+            feeds[source] = corpus.feed_hash(source)
+            logger.info(f"Vectorised {source}: {matrix.shape[0]} articles, {len(terms)} terms")
+
+        n_docs = sum(m.shape[0] for m, _ in parts)
+        max_count = max_df * n_docs if isinstance(max_df, float) else max_df
+        min_count = min_df * n_docs if isinstance(min_df, float) else min_df
+        vocabulary = sorted(t for t, c in doc_freq.items() if min_count <= c <= max_count)
+        index = {term: i for i, term in enumerate(vocabulary)}
+
+        remapped = []
+        for matrix, terms in parts:
+            mapping = np.array([index.get(t, -1) for t in terms], dtype=np.int64)
+            coo = matrix.tocoo()
+            keep = mapping[coo.col] >= 0
+            remapped.append(sp.csr_matrix(
+                (coo.data[keep], (coo.row[keep], mapping[coo.col[keep]])),
+                shape=(matrix.shape[0], len(vocabulary)),
+            ))
+        matrix = sp.vstack(remapped, format='csr') if remapped else \
+            sp.csr_matrix((0, len(vocabulary)), dtype=np.int32)
+        rows = pd.concat(rows, ignore_index=True) if rows else \
+            pd.DataFrame(columns=['source', 'article_idx', 'month'])
+        params = {'max_df': max_df, 'min_df': min_df, 'stop_words': stop_words}
+        return cls(matrix, vocabulary, rows, feeds, params)
+
+    def update(self, corpus: Optional[Corpus] = None, sources: Optional[Iterable[str]] = None) -> List[str]:
+        """Re-vectorise new or re-crawled sources against the fixed vocabulary"""
+        corpus = corpus or Corpus()
+        changed = [s for s in sorted(corpus.refresh(sources)) if corpus.feed_hash(s) != self.feeds.get(s)]
+        if not changed:
+            return []
+        index = {term: i for i, term in enumerate(self.vocabulary)}
+        keep = ~self.rows['source'].isin(changed).to_numpy()
+        parts, rows = [self.matrix[np.flatnonzero(keep)]], [self.rows[keep]]
+        for source in changed:
+            frame = _source_texts(corpus, source)
+            matrix, _ = _vectorize(frame['text'], index, self.params.get('stop_words', 'english'))
+            parts.append(matrix)
+            rows.append(frame[['source', 'article_idx', 'month']])
+            self.feeds[source] = corpus.feed_hash(source)
+            logger.info(f"Re-vectorised {source}: {matrix.shape[0]} articles")
+        self.matrix = sp.vstack(parts, format='csr')
+        self.rows = pd.concat(rows, ignore_index=True)
+        return changed
+
+    # ─── persistence ─────────────────────────────────────────────────────────
+    def save(self, directory: str = TOPIC_DIR):
+        os.makedirs(directory, exist_ok=True)
+        sp.save_npz(os.path.join(directory, 'dtm.part.npz'), self.matrix)
+        os.replace(os.path.join(directory, 'dtm.part.npz'), os.path.join(directory, 'dtm.npz'))
+        self.rows.to_parquet(os.path.join(directory, 'rows.part'))
+        os.replace(os.path.join(directory, 'rows.part'), os.path.join(directory, 'rows.parquet'))
+        meta = {'vocabulary': self.vocabulary, 'feeds': self.feeds, 'params': self.params}
+        with open(os.path.join(directory, 'meta.json.part'), 'w') as f:
+            json.dump(meta, f)
+        os.replace(os.path.join(directory, 'meta.json.part'), os.path.join(directory, 'meta.json'))
+
+    @classmethod
+    def load(cls, directory: str = TOPIC_DIR) -> 'DocumentTermMatrix':
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        matrix = sp.load_npz(os.path.join(directory, 'dtm.npz')).tocsr()
+        rows = pd.read_parquet(os.path.join(directory, 'rows.parquet'))
+        return cls(matrix, meta['vocabulary'], rows, meta['feeds'], meta['params'])
+
+    @classmethod
+    def load_or_build(cls, corpus: Optional[Corpus] = None, directory: str = TOPIC_DIR,
+                      **params) -> 'DocumentTermMatrix':
+        """The saved matrix, updated for changed feeds; built from scratch the first time"""
+        if os.path.exists(os.path.join(directory, 'meta.json')):
+            dtm = cls.load(directory)
+            if dtm.update(corpus):
+                dtm.save(directory)
+            return dtm
+        dtm = cls.build(corpus, **{**VECTORIZER_PARAMS, **params})
+        dtm.save(directory)
+        return dtm
+
+    @classmethod
+    def rebuild(cls, corpus: Optional[Corpus] = None, directory: str = TOPIC_DIR,
+                **params) -> 'DocumentTermMatrix':
+        dtm = cls.build(corpus, **{**VECTORIZER_PARAMS, **params})
+        dtm.save(directory)
+        return dtm
+
+    # ─── slicing ─────────────────────────────────────────────────────────────
+    def select(self, source: Union[str, Sequence[str], None] = None,
+               month: Union[str, Sequence[str], None] = None) -> np.ndarray:
+        """Row indices of the given source(s) and month(s)"""
+        mask = np.ones(len(self), dtype=bool)
+        for column, value in (('source', source), ('month', month)):
+            if value is not None:
+                values = [value] if isinstance(value, str) else list(value)
+                mask &= self.rows[column].isin(values).to_numpy()
+        return np.flatnonzero(mask)
+
+    def slice(self, **where) -> sp.csr_matrix:
+        return self.matrix[self.select(**where)]
+
+    @property
+    def months(self) -> List[str]:
+        return sorted(self.rows['month'].dropna().unique())
+
+
+def fit_lda(dtm: DocumentTermMatrix, n_components: int = 10, batch_size: int = 512,
+            passes: int = 1, n_jobs: Optional[int] = -1, random_state: int = 42,
+            lda: Optional[LatentDirichletAllocation] = None, **where) -> LatentDirichletAllocation:
+    """Online LDA over a slice of the matrix, mini-batch by mini-batch.
+
+    Pass an existing model as `lda` to continue training it on another
+    slice, e.g. the newest month.
+    """
+    rows = dtm.select(**where)
+    if lda is None:
+        lda = LatentDirichletAllocation(
+            n_components=n_components, learning_method='online', batch_size=batch_size,
+            total_samples=max(len(rows), 1), n_jobs=n_jobs, random_state=random_state,
+        )
+    rng = np.random.default_rng(random_state)
+    for _ in range(passes):
+        order = rng.permutation(rows)
+        for start in range(0, len(order), batch_size):
+            lda.partial_fit(dtm.matrix[np.sort(order[start:start + batch_size])])
+    return lda
+
+
+def top_words(lda: LatentDirichletAllocation, vocabulary: Sequence[str], top_n: int = 10) -> pd.DataFrame:
+    """One row per topic with its top_n words, as print_topics showed them"""
+    vocabulary = np.asarray(vocabulary, dtype=object)
+    return pd.DataFrame(
+        [vocabulary[topic.argsort()[:-top_n - 1:-1]] for topic in lda.components_],
+        columns=[f'word_{i}' for i in range(top_n)],
+    ).rename_axis('topic')
+
+
+def topic_drift(dtm: DocumentTermMatrix, lda: LatentDirichletAllocation, by: str = 'month',
+                batch_size: int = 4096, **where) -> pd.DataFrame:
+    """Mean document-topic proportions per month (or source) of a slice"""
+    rows = dtm.select(**where)
+    weights = np.vstack([
+        lda.transform(dtm.matrix[rows[start:start + batch_size]])
+        for start in range(0, len(rows), batch_size)
+    ]) if len(rows) else np.zeros((0, lda.n_components))
+    frame = pd.DataFrame(weights, columns=[f'topic_{i}' for i in range(lda.n_components)])
+    frame[by] = dtm.rows[by].to_numpy()[rows]
+    return frame.groupby(by).mean().sort_index()
+
+
+def monthly_topics(dtm: DocumentTermMatrix, n_components: int = 10, batch_size: int = 512,
+                   n_jobs: Optional[int] = -1, random_state: int = 42,
+                   source: Union[str, Sequence[str], None] = None) -> Dict[str, np.ndarray]:
+    """Topic-word matrices of one model trained month after month.
+
+    The model is warm-started from the previous month, so topic i stays
+    comparable across months and its word distribution shows the drift;
+    returns month -> normalised components.
+    """
+    lda = None
+    snapshots = {}
+    seen = 0
+    for month in dtm.months:
+        rows = len(dtm.select(source=source, month=month))
+        if not rows:
+            continue
+        # the online update weighs each batch against all articles seen so far
+        seen += rows
+        if lda is not None:
+            lda.set_params(total_samples=seen)
+        lda = fit_lda(dtm, n_components, batch_size, n_jobs=n_jobs, random_state=random_state,
+                      lda=lda, source=source, month=month)
+        snapshots[month] = lda.components_ / lda.components_.sum(axis=1, keepdims=True)
+    return snapshots
@@ -0,0 +1,132 @@
+# Declarative url rules for link triage
+#
+# Spiders declare their link filters as data instead of hand-written
+# is_relevant_url / sitemap matching code:
+#
+#     URL_RULES = {
+#         'allow': ['/article/', '/live/'],
+#         'deny': ['/video/', '/gallery/'],
+#         'date_in_path': r'/(?P<year>\d{4})/(?P<month>[a-z]{3})/(?P<day>\d{1,2})/',
+#         'date_range': ('2023-10-07', '2024-10-07'),
+#     }
+#
+# All rules are compiled into a single regex made of one optional lookahead
+# per rule, so classifying a url is one C-level match call no matter how many
+# patterns a spider declares, and every rule that matches is counted. Allow/
+# deny entries are regex fragments; plain substrings such as '/video/' work
+# as-is. ignore_case is True, False, or the rule kinds ('allow', 'deny',
+# 'date_in_path') to match case-insensitively.
+
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4,
+    'may': 5, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+
+RULE_KINDS = ('allow', 'deny', 'date_in_path')
+
+
+def _lookahead(name: str, pattern: str, ignore_case: bool) -> str:
+    if ignore_case:
+        pattern = f'(?i:{pattern})'
+    return f'(?:(?=.*?(?P<{name}>{pattern})))?'
+
+
+class UrlRules:
+    """Compiled allow/deny/date-in-path rules for one spider.
+
+    A url is relevant when no deny rule fires, at least one allow rule fires
+    (if any are declared) and, when date_in_path is set, the date found in
+    the path lies inside date_range. `fired` counts every rule hit plus the
+    final verdicts, for the closing stats.
+    """
+
+    def __init__(self, allow: Iterable[str] = (), deny: Iterable[str] = (),
+                 date_in_path: Optional[str] = None,
+                 date_range: Optional[Tuple[str, str]] = None,
+                 target: str = 'path', ignore_case: Union[bool, Iterable[str]] = True):
+        self.allow = list(allow)
+        self.deny = list(deny)
+        self.target = target
+        self.date_range = None
+        if date_range:
+            self.date_range = tuple(date.fromisoformat(d) for d in date_range)
+
+        if isinstance(ignore_case, bool):
+            ignore_case = RULE_KINDS if ignore_case else ()
+        fold = set(ignore_case)
+
+        parts = [_lookahead(f'deny_{i}', p, 'deny' in fold) for i, p in enumerate(self.deny)]
+        parts += [_lookahead(f'allow_{i}', p, 'allow' in fold) for i, p in enumerate(self.allow)]
+        self.has_date = bool(date_in_path)
+        if self.has_date:
+            parts.append(_lookahead('date', date_in_path, 'date_in_path' in fold))
+
+        self.pattern = re.compile('^' + ''.join(parts))
+        self.names = {
+            **{f'deny_{i}': f'deny:{p}' for i, p in enumerate(self.deny)},
+            **{f'allow_{i}': f'allow:{p}' for i, p in enumerate(self.allow)},
+        }
+        self.fired = Counter()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'UrlRules':
+        return cls(**config)
+
+    def _date(self, groups: Dict[str, str]) -> Optional[date]:
+        try:
+            month = groups['month']
+            month = int(month) if month.isdigit() else MONTHS[month[:3].lower()]
+            return date(int(groups['year']), month, int(groups.get('day') or 1))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def classify(self, url: str) -> Tuple[bool, str]:
+        """Return (relevant, reason) for a url in a single match"""
+        subject = urlparse(url).path if self.target == 'path' else url
+        groups = self.pattern.match(subject).groupdict()
+
+        deny = allow = None
+        for name, value in groups.items():
+            if value is None or name not in self.names:
+                continue
+            self.fired[self.names[name]] += 1
+            if name.startswith('deny_'):
+                deny = deny or self.names[name]
+            else:
+                allow = allow or self.names[name]
+
+        if self.has_date and groups['date'] is not None:
+            self.fired['date_in_path'] += 1
+
+        if deny:
+            return self._verdict(False, deny)
+        if self.allow and not allow:
+            return self._verdict(False, 'no_allow_rule')
+        if self.has_date:
+            if groups['date'] is None:
+                return self._verdict(False, 'no_date_in_path')
+            if self.date_range:
+                day = self._date(groups)
+                start, end = self.date_range
+                if day is None or not start <= day <= end:
+                    return self._verdict(False, 'date_out_of_range')
+        return self._verdict(True, allow or 'date_in_path')
+
+    def _verdict(self, relevant: bool, reason: str) -> Tuple[bool, str]:
+        self.fired['relevant' if relevant else 'rejected'] += 1
+        return relevant, reason
+
+    def is_relevant(self, url: str) -> bool:
+        return self.classify(url)[0]
+
+    def filter(self, urls: Iterable[str]) -> List[str]:
+        """Keep the relevant urls of a listing page or sitemap"""
+        return [url for url in urls if self.classify(url)[0]]
@@ -0,0 +1,192 @@
+# Active/passive voice detection over the corpus
+#
+# DetectingActiveVsPassiveVoice ran nlp(full_text) with en_core_web_trf to
+# split sentences, then nlp(sentence) again on every sentence before
+# matching, so every token went through the transformer twice, one document
+# at a time. VoiceDetector streams documents through nlp.pipe in batches,
+# runs the same Matcher rules directly on the doc.sents spans of that single
+# parse, and appends results to disk as it goes, so an interrupted run
+# resumes where it stopped. Long articles are chunked by
+# chunking.pipe_long instead of being set aside by length. With a
+# parsecache.ParseCache the parses are read from (and added to) the shared
+# cache instead.
+#
+#     python -m newscrawler.voice india            # one corpus source
+#     python -m newscrawler.voice india --model en_core_web_sm --n-process 4
+#
+# Sentences are matched inside their document's parse rather than
+# re-parsed in isolation, which is also how the parser was trained.
+
+import argparse
+import csv
+import logging
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import spacy
+from spacy.matcher import Matcher
+
+from newscrawler.chunking import pipe_long
+from newscrawler.corpus import Corpus
+from newscrawler.parsecache import ParseCache
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+VOICE_DIR = os.path.join(PROJECT_ROOT, 'data', 'active_vs_passive_voice')
+
+# Rules of the notebook, from
+# https://stackoverflow.com/questions/74528441/detect-passive-or-active-sentence-from-text
+PASSIVE_RULES = [
+    [{'DEP': 'nsubjpass'}, {'DEP': 'aux', 'OP': '*'}, {'DEP': 'auxpass'}, {'TAG': 'VBN'}],
+    [{'DEP': 'nsubjpass'}, {'DEP': 'aux', 'OP': '*'}, {'DEP': 'auxpass'}, {'TAG': 'VBZ'}],
+    [{'DEP': 'nsubjpass'}, {'DEP': 'aux', 'OP': '*'}, {'DEP': 'auxpass'}, {'TAG': 'RB'}, {'TAG': 'VBN'}],
+]
+
+ACTIVE_RULES = [
+    [{'DEP': 'nsubj'}, {'TAG': 'VBD', 'DEP': 'ROOT'}],
+    [{'DEP': 'nsubj'}, {'TAG': 'VBP'}, {'TAG': 'VBG', 'OP': '!'}],
+    [{'DEP': 'nsubj'}, {'DEP': 'aux', 'OP': '*'}, {'TAG': 'VB'}],
+    [{'DEP': 'nsubj'}, {'DEP': 'aux', 'OP': '*'}, {'TAG': 'VBG'}],
+    [{'DEP': 'nsubj'}, {'TAG': 'RB', 'OP': '*'}, {'TAG': 'VBG'}],
+    [{'DEP': 'nsubj'}, {'TAG': 'RB', 'OP': '*'}, {'TAG': 'VBZ'}],
+    [{'DEP': 'nsubj'}, {'TAG': 'RB', 'OP': '+'}, {'TAG': 'VBD'}],
+]
+
+# Components the rules do not look at
+UNUSED_COMPONENTS = ['ner', 'lemmatizer', 'textcat', 'textcat_multilabel', 'entity_linker']
+
+FIELDS = ['article', 'sentence', 'span', 'start_char']
+
+logger = logging.getLogger(__name__)
+
+
+class VoiceDetector:
+    """Passive/active Matcher over one parse per document."""
+
+    def __init__(self, model: str = 'en_core_web_trf', nlp=None, batch_size: int = 32,
+                 n_process: int = 1, gpu: bool = True, max_tokens: int = 400,
+                 cache: Optional[ParseCache] = None):
+        self.cache = cache
+        if cache is not None:
+            nlp = cache.nlp
+        if nlp is None:
+            if gpu:
+                spacy.prefer_gpu()
+            nlp = spacy.load(model, exclude=UNUSED_COMPONENTS)
+        self.nlp = nlp
+        self.batch_size = batch_size
+        # extra processes only pay off for CPU pipelines; a transformer on
+        # GPU should stay in one process with larger batches
+        self.n_process = n_process
+        self.max_tokens = max_tokens
+        self.matcher = Matcher(nlp.vocab)
+        self.matcher.add('Passive', PASSIVE_RULES)
+        self.matcher.add('Active', ACTIVE_RULES)
+
+    def match_doc(self, doc) -> Iterator[Tuple[str, Dict]]:
+        """('Passive'|'Active', row) for every rule match, sentence by sentence"""
+        for sent in doc.sents:
+            for span in self.matcher(sent, as_spans=True):
+                yield span.label_, {
+                    'sentence': sent.text,
+                    'span': span.text,
+                    'start_char': sent.start_char,
+                }
+
+    def detect(self, docs: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, List[Tuple[str, Dict]]]]:
+        """Stream (key, text) pairs; yield (key, matches) per document"""
+        if self.cache is not None:
+            parsed = self.cache.parse(docs)
+        else:
+            parsed = pipe_long(self.nlp, docs, self.max_tokens, self.batch_size, self.n_process)
+        for key, doc in parsed:
+            yield key, list(self.match_doc(doc))
+
+    def run(self, docs: Iterable[Tuple[str, str]], name: str, out_dir: str = VOICE_DIR) -> Dict[str, int]:
+        """Write <name>_passive_sentences.csv / <name>_active_sentences.csv.
+
+        Rows are appended and flushed document by document; the keys of
+        finished documents go to <name>_voice_done.txt, and documents listed
+        there are skipped on the next run.
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        paths = {
+            'Passive': os.path.join(out_dir, f'{name}_passive_sentences.csv'),
+            'Active': os.path.join(out_dir, f'{name}_active_sentences.csv'),
+        }
+        done_path = os.path.join(out_dir, f'{name}_voice_done.txt')
+        done = set()
+        if os.path.exists(done_path):
+            with open(done_path) as f:
+                done = {line.rstrip('\n') for line in f}
+
+        files = {}
+        writers = {}
+        for label, path in paths.items():
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            files[label] = open(path, 'a', newline='', encoding='utf-8')
+            writers[label] = csv.DictWriter(files[label], fieldnames=FIELDS)
+            if new:
+                writers[label].writeheader()
+
+        counts = {'documents': 0, 'skipped': 0, 'Passive': 0, 'Active': 0}
+
+        def todo():
+            # lazily, so documents keep streaming from docs into the parser
+            for key, text in docs:
+                if key in done:
+                    counts['skipped'] += 1
+                else:
+                    yield key, text
+
+        try:
+            with open(done_path, 'a') as done_file:
+                for key, matches in self.detect(todo()):
+                    for label, row in matches:
+                        writers[label].writerow({'article': key, **row})
+                        counts[label] += 1
+                    for f in files.values():
+                        f.flush()
+                    done_file.write(f'{key}\n')
+                    done_file.flush()
+                    counts['documents'] += 1
+        finally:
+            for f in files.values():
+                f.close()
+
+        logger.info(f"{name}: {counts['documents']} documents, {counts['Passive']} passive and "
+                    f"{counts['Active']} active matches, {counts['skipped']} already done")
+        return counts
+
+
+def corpus_docs(source: str, corpus: Optional[Corpus] = None) -> Iterator[Tuple[str, str]]:
+    """(source:article_idx, title + text) for one corpus source"""
+    corpus = corpus or Corpus()
+    table = corpus.table(['article_idx', 'title', 'text'], [source])
+    for idx, title, text in zip(table.column('article_idx').to_pylist(),
+                                table.column('title').to_pylist(),
+                                table.column('text').to_pylist()):
+        yield f'{source}:{idx}', ' '.join(part for part in (title, text) if part)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Active/passive voice sentences of a corpus source')
+    parser.add_argument('source', help='corpus source, e.g. india or cnn')
+    parser.add_argument('--model', default='en_core_web_trf')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--max-tokens', type=int, default=400, help='chunk size for long articles')
+    parser.add_argument('--out-dir', default=VOICE_DIR)
+    parser.add_argument('--cache', action='store_true',
+                        help='read/write parses through the shared parse cache')
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache:
+        spacy.prefer_gpu()
+        # the full pipeline, so the cached parses also serve NER
+        cache = ParseCache(spacy.load(args.model), max_tokens=args.max_tokens,
+                           batch_size=args.batch_size, n_process=args.n_process)
+    detector = VoiceDetector(args.model, batch_size=args.batch_size, n_process=args.n_process,
+                             max_tokens=args.max_tokens, cache=cache)
+    detector.run(corpus_docs(args.source), args.source, args.out_dir)
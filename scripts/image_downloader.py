@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
+import glob
+import argparse
 import logging
 import time
 import random
+import asyncio
+import hashlib
+import uuid
+import textwrap
+from itertools import islice
+from collections import defaultdict
 from urllib.parse import urlparse, unquote
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import aiohttp
 
 # ─── CONFIGURE LOGGING ────────────────────────────────────────────────────────
 LOG_FILE = "download_images.log"
@@ -22,129 +28,555 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# ─── SETUP SESSION WITH RETRIES ───────────────────────────────────────────────
-session = requests.Session()
-retry_strategy = Retry(
-    total=5,
-    backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
-    allowed_methods=["HEAD", "GET", "OPTIONS"]
-)
-adapter = HTTPAdapter(max_retries=retry_strategy)
-session.mount("https://", adapter)
-session.mount("http://", adapter)
-session.headers.update({
+# ─── CONNECTION POOL, POLITENESS AND RETRIES ──────────────────────────────────
+MAX_CONNECTIONS = 64         # global pool shared by all sources
+PER_HOST        = 4          # concurrent requests per CDN host
+HOST_DELAY      = (0.1, 0.3) # seconds between request starts on one host
+CHUNK_SIZE      = 64 * 1024
+ARTICLE_WINDOW  = 256        # articles of one source in flight at a time
+
+# Same semantics as the former urllib3 Retry(total=5, backoff_factor=1, ...)
+RETRIES        = 5
+BACKOFF_FACTOR = 1
+RETRY_STATUS   = {429, 500, 502, 503, 504}
+
+HEADERS = {
     "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                    "AppleWebKit/537.36 (KHTML, like Gecko) "
                    "Chrome/114.0.0.0 Safari/537.36"),
     "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-})
+}
+
+
+class HostLimiter:
+    """Per-host semaphore plus a minimum spacing between request starts.
+
+    The global connector keeps the total number of connections bounded;
+    this keeps each CDN at PER_HOST requests in flight and spaces them out
+    like the old per-image sleep did, while other hosts proceed in parallel.
+    With max_rate (bytes/s) set, the total download bandwidth is paced too.
+    """
+
+    def __init__(self, per_host=PER_HOST, delay=HOST_DELAY, max_rate=None):
+        self.per_host = per_host
+        self.delay = delay
+        self.max_rate = max_rate
+        self.semaphores = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self.next_start = defaultdict(float)
+        self.next_byte = 0.0
+
+    def slot(self, host):
+        return self.semaphores[host]
+
+    async def wait_turn(self, host):
+        now = time.monotonic()
+        start = max(now, self.next_start[host])
+        self.next_start[host] = start + random.uniform(*self.delay)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def consume(self, nbytes):
+        """Wait until nbytes more fit into the global bandwidth cap"""
+        if not self.max_rate:
+            return
+        now = time.monotonic()
+        start = max(now, self.next_byte)
+        self.next_byte = start + nbytes / self.max_rate
+        if start > now:
+            await asyncio.sleep(start - now)
 
-def read_articles(file_path):
+
+def backoff(attempt, retry_after=None):
+    """Seconds to wait before retry number `attempt` (1-based)"""
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_FACTOR * (2 ** (attempt - 1))
+
+def iter_articles(file_path, read_size=1 << 20):
+    """Yield the articles of a crawl output file one at a time.
+
+    Handles the spiders' json feeds (one top-level list) without loading
+    the whole list, and jsonlines feeds such as the monitor's.
+    """
+    decoder = json.JSONDecoder()
+    skip = ' \t\r\n,'
     try:
         with open(file_path, 'r') as f:
-            data = json.load(f)
-        if not isinstance(data, list):
-            logger.warning("Expected a list in %s", file_path)
-            return []
-        return data
+            buf = f.read(read_size).lstrip()
+            if buf.startswith('['):
+                buf = buf[1:]
+            elif not buf.startswith('{'):
+                if buf:
+                    logger.warning("Expected a list in %s", file_path)
+                return
+            pos = 0
+            eof = False
+            while True:
+                while pos < len(buf) and buf[pos] in skip:
+                    pos += 1
+                if buf.startswith(']', pos) or (eof and pos >= len(buf)):
+                    return
+                try:
+                    article, pos = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    # Object continues past the buffer: drop what has been
+                    # consumed and read on
+                    more = f.read(read_size)
+                    eof = not more
+                    buf = buf[pos:] + more
+                    pos = 0
+                    continue
+                yield article
     except FileNotFoundError:
         logger.error("File not found: %s", file_path)
     except json.JSONDecodeError:
         logger.error("Could not decode JSON from %s", file_path)
-    return []
 
 def sanitize_filename(url: str) -> str:
     parsed = urlparse(url)
     return unquote(os.path.basename(parsed.path))
 
-def download_image(image_url, save_dir, prefix, timeout=10):
-    filename = f"{prefix}_{sanitize_filename(image_url)}"
-    save_path = os.path.join(save_dir, filename)
-    if os.path.exists(save_path):
-        logger.debug("Skipping existing %s", save_path)
-        return save_path
+# ─── CONTENT-ADDRESSED IMAGE STORE ────────────────────────────────────────────
+class ImageStore:
+    """Images stored once by sha256 of their bytes, plus a url → hash index.
 
-    referer = f"{urlparse(image_url).scheme}://{urlparse(image_url).netloc}/"
-    try:
-        logger.info("Downloading %s → %s", image_url, save_path)
-        resp = session.get(image_url,
-                           stream=True,
-                           timeout=timeout,
-                           headers={"Referer": referer})
-        resp.raise_for_status()
-        os.makedirs(save_dir, exist_ok=True)
-        with open(save_path, 'wb') as out:
-            for chunk in resp.iter_content(8192):
-                out.write(chunk)
-        logger.info("Saved %s", save_path)
-        return save_path
-
-    except Exception as e:
-        logger.error("Failed %s: %s", image_url, e)
-        if os.path.exists(save_path):
-            os.remove(save_path)
+    Layout under root:
+        ab/cd/abcd…ef.jpg      one file per distinct image content
+        url_index.jsonl        {"url", "sha256", "path", "bytes"} per fetched url
+        tmp/                   in-progress downloads
+
+    A url in the index is never fetched again, and a url whose bytes match
+    an image already stored (the same wire photo used by many articles)
+    only adds an index line. Urls that failed are remembered for the rest
+    of the run only, so a dead link shared by many articles is tried once
+    per run and again on the next one.
+    """
+
+    INDEX_FILE = "url_index.jsonl"
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.index_path = os.path.join(root, self.INDEX_FILE)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.by_url = {}
+        self.by_hash = {}
+        self.pending = {}
+        self.failed = set()
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # torn last line after a crash
+                if os.path.exists(entry["path"]):
+                    self.by_url[entry["url"]] = entry
+                    self.by_hash.setdefault(entry["sha256"], entry["path"])
+        logger.info("Image store %s: %d urls, %d unique images",
+                    self.root, len(self.by_url), len(self.by_hash))
+
+    def lookup(self, url):
+        return self.by_url.get(url)
+
+    def mark_failed(self, url):
+        self.failed.add(url)
+
+    def new_tmp_path(self):
+        return os.path.join(self.tmp_dir, f"{uuid.uuid4().hex}.part")
+
+    def path_for(self, sha, url):
+        ext = os.path.splitext(sanitize_filename(url))[1].lower()
+        return os.path.join(self.root, sha[:2], sha[2:4], f"{sha}{ext}")
+
+    def put(self, url, tmp_path, sha, nbytes):
+        """Move a finished download into the store and index its url"""
+        path = self.by_hash.get(sha)
+        if path:
+            os.remove(tmp_path)
+        else:
+            path = self.path_for(sha, url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            self.by_hash[sha] = path
+
+        entry = {"url": url, "sha256": sha, "path": path, "bytes": nbytes}
+        self.by_url[url] = entry
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+async def download_image(session, limiter, store, image_url, timeout=10):
+    """Fetch one url into the store; returns its index entry or None.
+
+    Concurrent requests for the same url share a single download, and a
+    url that already failed in this run is not fetched again.
+    """
+    entry = store.lookup(image_url)
+    if entry:
+        logger.debug("Skipping known %s", image_url)
+        return entry
+    if image_url in store.failed:
+        logger.debug("Skipping %s, failed earlier in this run", image_url)
         return None
+    task = store.pending.get(image_url)
+    if task is None:
+        task = asyncio.ensure_future(fetch_image(session, limiter, store, image_url, timeout))
+        task.add_done_callback(lambda _: store.pending.pop(image_url, None))
+        store.pending[image_url] = task
+    return await task
 
-def process_source(src_name, json_path, image_dir, output_dir,
-                   num_articles=None, start_idx=0):
-    logger.info("=== %s: starting ===", src_name)
-    articles = read_articles(json_path)
-    if not articles:
-        return
-
-    end_idx = min(start_idx + num_articles, len(articles)) if num_articles else len(articles)
-    for idx in range(start_idx, end_idx):
-        logger.info("[%s] Article %d/%d", src_name, idx+1, len(articles))
-        local_paths = []
-        for img_i, url in enumerate(articles[idx].get('images', [])):
-            prefix = f"{src_name}_art{idx+1}_img{img_i+1}"
-            path = download_image(url, image_dir, prefix)
-            if path:
-                local_paths.append(path)
-            time.sleep(random.uniform(0.1, 0.3))
-        articles[idx]['local_images'] = local_paths
+async def fetch_image(session, limiter, store, image_url, timeout=10):
+    parsed = urlparse(image_url)
+    host = parsed.netloc
+    referer = f"{parsed.scheme}://{host}/"
+    client_timeout = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
 
-    os.makedirs(output_dir, exist_ok=True)
-    out_path = os.path.join(output_dir, f"{src_name}_with_local_images.json")
-    with open(out_path, 'w') as f:
-        json.dump(articles, f, indent=2)
-    logger.info("=== %s: done, wrote %s ===", src_name, out_path)
+    for attempt in range(RETRIES + 1):
+        retry_after = None
+        tmp_path = store.new_tmp_path()
+        try:
+            async with limiter.slot(host):
+                await limiter.wait_turn(host)
+                logger.info("Downloading %s", image_url)
+                async with session.get(image_url,
+                                       timeout=client_timeout,
+                                       headers={"Referer": referer}) as resp:
+                    if resp.status in RETRY_STATUS and attempt < RETRIES:
+                        retry_after = resp.headers.get("Retry-After")
+                        raise aiohttp.ClientResponseError(
+                            resp.request_info, resp.history,
+                            status=resp.status, message=resp.reason)
+                    resp.raise_for_status()
 
-if __name__ == "__main__":
-    data_path        = "../newscrawler/data"
-    image_save_dir   = "../data/images"
-    updated_json_dir = "../data/with_local_paths"
-    NUM_ARTICLES     = None   # None = all articles; or e.g. 5
-
-    news_files = {
-        "cnn":    f"{data_path}/cnn_articles_20250601.json",
-        "ht":     f"{data_path}/hindustan_times_articles_20250601.json",
-        "ind":    f"{data_path}/india_articles_20250528.json",
-        "nbc":    f"{data_path}/nbcnews_articles_20250528.json",
-        "news18": f"{data_path}/news18_articles_20250601.json",
-        "nweek":  f"{data_path}/newsweek_articles_20250601.json",
-        "nypost": f"{data_path}/nypost_articles_20250601.json",
-        "bbc":    f"{data_path}/bbcnews_articles_20250513.json",
-    }
-
-    # ─── PARALLELIZE ACROSS SOURCES ──────────────────────────────────────────
-    with ThreadPoolExecutor(max_workers=len(news_files)) as exec:
-        futures = {
-            exec.submit(
-                process_source,
-                src,
-                path,
-                image_save_dir,
-                updated_json_dir,
-                NUM_ARTICLES,
-                0
-            ): src
-            for src, path in news_files.items()
+                    # Hash while streaming to a temp file; the final name
+                    # is only known once all bytes have been seen
+                    digest = hashlib.sha256()
+                    nbytes = 0
+                    with open(tmp_path, 'wb') as out:
+                        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                            await limiter.consume(len(chunk))
+                            digest.update(chunk)
+                            nbytes += len(chunk)
+                            out.write(chunk)
+                entry = store.put(image_url, tmp_path, digest.hexdigest(), nbytes)
+                logger.info("Saved %s → %s", image_url, entry["path"])
+                return entry
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status = getattr(e, "status", None)
+            retryable = status is None or status in RETRY_STATUS
+            if retryable and attempt < RETRIES:
+                wait = backoff(attempt + 1, retry_after)
+                logger.warning("Retry %d/%d for %s in %.1fs: %s",
+                               attempt + 1, RETRIES, image_url, wait, e)
+                await asyncio.sleep(wait)
+                continue
+            logger.error("Failed %s: %s", image_url, e)
+        except Exception as e:
+            logger.error("Failed %s: %s", image_url, e)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        store.mark_failed(image_url)
+        return None
+
+# ─── RESUMABLE PER-SOURCE MANIFEST ────────────────────────────────────────────
+class Manifest:
+    """Append-only JSONL record of every image handled for one source.
+
+    One row per (article_url, image_url) attempt:
+        {"article_url", "image_url", "local_path", "status", "bytes", "sha"}
+    Rows are flushed as they are written, so after an interruption the
+    images already marked "ok" are skipped and failed ones are retried.
+    The latest row for a pair wins.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = load_manifest_rows([path])
+        self.file = open(path, 'a', buffering=1)
+
+    def done(self, article_url, image_url):
+        return ok_row(self.rows, article_url, image_url)
+
+    def record(self, article_url, image_url, entry):
+        row = {
+            "article_url": article_url,
+            "image_url": image_url,
+            "local_path": entry["path"] if entry else None,
+            "status": "ok" if entry else "failed",
+            "bytes": entry["bytes"] if entry else 0,
+            "sha": entry["sha256"] if entry else None,
         }
-        for fut in as_completed(futures):
-            src = futures[fut]
+        self.rows[(article_url, image_url)] = row
+        self.file.write(json.dumps(row) + "\n")
+        return row
+
+    def close(self):
+        self.file.close()
+
+def load_manifest_rows(paths):
+    """(article_url, image_url) -> row over one or several manifests.
+
+    Within a file the latest row wins; across files (shards) an "ok" row
+    is never replaced by a failure recorded elsewhere.
+    """
+    rows = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        latest = {}
+        with open(path) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # torn last line after a crash
+                latest[(row["article_url"], row["image_url"])] = row
+        for key, row in latest.items():
+            if row["status"] == "ok" or key not in rows:
+                rows[key] = row
+    return rows
+
+def ok_row(rows, article_url, image_url):
+    row = rows.get((article_url, image_url))
+    return row if row and row["status"] == "ok" else None
+
+def manifest_path(output_dir, src_name, shard=None):
+    if shard and shard[1] > 1:
+        return os.path.join(output_dir, f"{src_name}_manifest.shard{shard[0]}of{shard[1]}.jsonl")
+    return os.path.join(output_dir, f"{src_name}_manifest.jsonl")
+
+def in_shard(image_url, shard):
+    """Deterministic split of image urls over n machines"""
+    if not shard:
+        return True
+    index, count = shard
+    digest = hashlib.sha1(image_url.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count == index
+
+def article_key(article, idx):
+    return article.get('url') or f"#{idx}"
+
+async def process_source(session, limiter, store, src_name, json_path, output_dir,
+                         num_articles=None, start_idx=0, shard=None):
+    logger.info("=== %s: starting ===", src_name)
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = Manifest(manifest_path(output_dir, src_name, shard))
+    stop_idx = start_idx + num_articles if num_articles else None
+
+    async def fetch_article(idx, article):
+        key = article_key(article, idx)
+        urls = [url for url in article.get('images', []) if in_shard(url, shard)]
+        todo = [url for url in urls if not manifest.done(key, url)]
+        entries = await asyncio.gather(*(
+            download_image(session, limiter, store, url) for url in todo
+        ))
+        for url, entry in zip(todo, entries):
+            manifest.record(key, url, entry)
+        logger.info("[%s] Article %d: %d/%d images (%d already done)",
+                    src_name, idx+1, sum(1 for e in entries if e), len(todo),
+                    len(urls) - len(todo))
+
+    failed = 0
+
+    def collect(done):
+        # an article whose task raised never reached the manifest
+        nonlocal failed
+        for future in done:
             try:
-                fut.result()
+                future.result()
             except Exception as e:
-                logger.error("Source %s raised: %s", src, e)
+                failed += 1
+                logger.error("[%s] Article %d failed: %r", src_name, tasks.pop(future) + 1, e)
+            else:
+                tasks.pop(future)
+
+    # Articles stream in; at most ARTICLE_WINDOW are in flight, and
+    # HostLimiter decides how many requests actually hit each CDN
+    pending = set()
+    tasks = {}
+    try:
+        articles = islice(enumerate(iter_articles(json_path)), start_idx, stop_idx)
+        for idx, article in articles:
+            future = asyncio.ensure_future(fetch_article(idx, article))
+            tasks[future] = idx
+            pending.add(future)
+            if len(pending) >= ARTICLE_WINDOW:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                collect(done)
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            collect(done)
+    finally:
+        manifest.close()
+
+    if failed:
+        logger.error("=== %s: %d articles failed and are retried on the next run ===",
+                     src_name, failed)
+    if shard and shard[1] > 1:
+        logger.info("=== %s: shard %d/%d done, run --merge once all shards finished ===",
+                    src_name, shard[0], shard[1])
+        return failed
+    out_path = write_with_local_images(src_name, json_path, output_dir, manifest.rows)
+    logger.info("=== %s: done, wrote %s ===", src_name, out_path)
+    return failed
+
+def merge_source(src_name, json_path, output_dir):
+    """Combine every shard manifest of a source into its final output"""
+    paths = sorted(glob.glob(os.path.join(output_dir, f"{glob.escape(src_name)}_manifest*.jsonl")))
+    if not paths:
+        logger.warning("No manifests for %s in %s", src_name, output_dir)
+        return None
+    out_path = write_with_local_images(src_name, json_path, output_dir, load_manifest_rows(paths))
+    logger.info("=== %s: merged %d manifests into %s ===", src_name, len(paths), out_path)
+    return out_path
+
+def write_with_local_images(src_name, json_path, output_dir, rows):
+    """Build <src>_with_local_images.json from the articles and manifest rows.
+
+    Written one article at a time in the same layout as json.dump(..., indent=2),
+    to a temp file that replaces the output only once complete.
+    """
+    out_path = os.path.join(output_dir, f"{src_name}_with_local_images.json")
+    tmp_path = f"{out_path}.part"
+    count = 0
+    with open(tmp_path, 'w') as out:
+        out.write("[")
+        for idx, article in enumerate(iter_articles(json_path)):
+            key = article_key(article, idx)
+            done = [ok_row(rows, key, url) for url in article.get('images', [])]
+            done = [row for row in done if row]
+            article['local_images'] = [row['local_path'] for row in done]
+            article['image_hashes'] = [row['sha'] for row in done]
+            out.write(",\n" if count else "\n")
+            out.write(textwrap.indent(json.dumps(article, indent=2), "  "))
+            count += 1
+        out.write("\n]" if count else "]")
+    os.replace(tmp_path, out_path)
+    return out_path
+
+async def download_all(news_files, image_dir, output_dir, num_articles=None, start_idx=0,
+                       shard=None, max_rate=None, per_host=PER_HOST,
+                       max_connections=MAX_CONNECTIONS):
+    connector = aiohttp.TCPConnector(limit=max_connections, ttl_dns_cache=300)
+    limiter = HostLimiter(per_host=per_host, max_rate=max_rate)
+    store = ImageStore(image_dir)
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        results = await asyncio.gather(*(
+            process_source(session, limiter, store, src, path, output_dir,
+                           num_articles, start_idx, shard)
+            for src, path in news_files.items()
+        ), return_exceptions=True)
+    # sources that raised or had failed articles, for the exit status
+    failures = 0
+    for src, result in zip(news_files, results):
+        if isinstance(result, Exception):
+            logger.error("Source %s raised: %s", src, result)
+            failures += 1
+        elif result:
+            failures += 1
+    return failures
+
+# ─── COMMAND LINE ─────────────────────────────────────────────────────────────
+DATA_DIR   = "../newscrawler/data"
+IMAGE_DIR  = "../data/images"
+OUTPUT_DIR = "../data/with_local_paths"
+
+# Short names the analysis notebooks use for <src>_with_local_images.json
+SOURCE_ALIASES = {
+    "hindustan_times": "ht",
+    "india":           "ind",
+    "nbcnews":         "nbc",
+    "newsweek":        "nweek",
+    "bbcnews":         "bbc",
+}
+
+def discover_sources(patterns):
+    """Map source name -> newest crawl file among the files matching the globs.
+
+    cnn_articles_20250601.json is source "cnn"; dated names sort
+    chronologically, so the newest crawl of each source wins.
+    """
+    files = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            name = os.path.basename(path).split("_articles")[0]
+            src = SOURCE_ALIASES.get(name, name)
+            if src in files and os.path.basename(files[src]) >= os.path.basename(path):
+                continue
+            files[src] = path
+    return files
+
+def parse_shard(value):
+    try:
+        index, count = (int(v) for v in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n, got {value!r}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count})")
+    return index, count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Download the images of crawled articles into the content-addressed store.",
+        epilog="Example, split over two machines: "
+               "image_downloader.py --shard 0/2 on one, --shard 1/2 on the other, "
+               "then image_downloader.py --merge once the manifests are together.")
+    parser.add_argument("inputs", nargs="*", default=[f"{DATA_DIR}/*_articles_*.json"],
+                        help="article files or globs (default: %(default)s)")
+    parser.add_argument("--sources", help="comma separated source names to keep, e.g. cnn,ht")
+    parser.add_argument("--image-dir", default=IMAGE_DIR, help="image store (default: %(default)s)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help="manifests and *_with_local_images.json (default: %(default)s)")
+    parser.add_argument("--shard", type=parse_shard,
+                        help="i/n: only download image urls that hash to shard i of n")
+    parser.add_argument("--merge", action="store_true",
+                        help="only merge the shard manifests into per-source outputs")
+    parser.add_argument("--max-rate", type=float,
+                        help="total bandwidth cap in MB/s")
+    parser.add_argument("--per-host", type=int, default=PER_HOST,
+                        help="concurrent requests per host (default: %(default)s)")
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS,
+                        help="size of the connection pool (default: %(default)s)")
+    parser.add_argument("--num-articles", type=int, help="articles per source (default: all)")
+    parser.add_argument("--start-idx", type=int, default=0, help="first article per source")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    news_files = discover_sources(args.inputs)
+    if args.sources:
+        keep = {s.strip() for s in args.sources.split(",")}
+        news_files = {src: path for src, path in news_files.items() if src in keep}
+    if not news_files:
+        logger.error("No article files match %s", " ".join(args.inputs))
+        return 1
+    for src, path in sorted(news_files.items()):
+        logger.info("%s: %s", src, path)
+
+    if args.merge:
+        for src, path in news_files.items():
+            merge_source(src, path, args.output_dir)
+        return 0
+
+    failures = asyncio.run(download_all(
+        news_files, args.image_dir, args.output_dir,
+        num_articles=args.num_articles,
+        start_idx=args.start_idx,
+        shard=args.shard,
+        max_rate=args.max_rate * 1024 * 1024 if args.max_rate else None,
+        per_host=args.per_host,
+        max_connections=args.max_connections,
+    ))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())